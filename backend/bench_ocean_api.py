@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Ocean API Load Benchmark
+Drives every /api/ocean/* endpoint under concurrency and reports latency
+percentiles, throughput and memory.
+
+By default the API runs in-process against the local data source
+(OCEAN_DATA_SOURCE=local, synthetic or recorded cubes), so no network or
+Copernicus credentials are needed. Point --url at a running server to
+benchmark it over HTTP instead.
+
+Usage:
+    python3 bench_ocean_api.py                      # in-process, warm cache
+    python3 bench_ocean_api.py --cold               # clear caches before each scenario
+    python3 bench_ocean_api.py -c 16 -n 400 --only live
+    python3 bench_ocean_api.py --url http://localhost:5000 --json results.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# In-process runs must not touch the live service or the production cache
+os.environ.setdefault('OCEAN_DATA_SOURCE', 'local')
+os.environ.setdefault('OCEAN_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'nara-ocean-bench-cache'))
+os.environ.setdefault('OCEAN_ARCHIVE_DIR', os.path.join(tempfile.gettempdir(), 'nara-ocean-bench-archive'))
+os.environ.setdefault('OCEAN_PREFETCH', '0')
+
+# Days archived before in-process runs (the time series and anomaly scenarios
+# read only the archive and the climatology built from it)
+ARCHIVE_SEED_DAYS = 30
+
+
+def build_scenarios():
+    """(name, path) pairs covering every /api/ocean/* endpoint"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    week_ago = (datetime.now() - timedelta(days=6)).strftime('%Y-%m-%d')
+    year_ago = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+    stations = '6.93,79.80;7.95,79.75;6.03,80.22;8.57,81.25;9.66,80.02'
+    section = '6.93,79.50;6.93,79.65;6.93,79.80'
+    route = '6.93,79.80;6.03,80.22;8.57,81.25;9.66,80.02'
+
+    return [
+        ('temperature/live', f'/api/ocean/temperature/live?date={today}'),
+        ('temperature/live bin', f'/api/ocean/temperature/live?date={today}&format=bin'),
+        ('temperature/live int16', f'/api/ocean/temperature/live?date={today}&format=bin&encoding=int16'),
+        ('temperature/live level=2', f'/api/ocean/temperature/live?date={today}&level=2'),
+        ('temperature/live bbox', f'/api/ocean/temperature/live?date={today}&bbox=79.7,6.7,80.1,7.1'),
+        ('temperature/live stats', f'/api/ocean/temperature/live?date={today}&fields=stats'),
+        ('temperature/anomaly', f'/api/ocean/temperature/anomaly?date={today}'),
+        ('fronts', f'/api/ocean/fronts?date={today}'),
+        ('currents/live', f'/api/ocean/currents/live?date={today}'),
+        ('currents/live bin', f'/api/ocean/currents/live?date={today}&format=bin'),
+        ('currents/arrows z7', f'/api/ocean/currents/arrows?date={today}&zoom=7'),
+        ('currents/streamlines z7', f'/api/ocean/currents/streamlines?date={today}&zoom=7'),
+        ('waves/live', f'/api/ocean/waves/live?date={today}'),
+        ('waves/live bin', f'/api/ocean/waves/live?date={today}&format=bin'),
+        ('waves/live step', f'/api/ocean/waves/live?date={today}&step=0'),
+        ('waves/live animation', f'/api/ocean/waves/live?date={today}&animation=true&encoding=int16'),
+        ('salinity/live', f'/api/ocean/salinity/live?date={today}'),
+        ('historical 7d', f'/api/ocean/historical?dataset=temperature&start_date={week_ago}&end_date={today}'),
+        ('historical 7d ndjson', f'/api/ocean/historical?dataset=temperature&start_date={week_ago}&end_date={today}&format=ndjson'),
+        ('station 5 points', f'/api/ocean/station?date={today}&points={stations}'),
+        ('transect 3 legs', f'/api/ocean/transect?date={today}&path={route}'),
+        ('transect bin', f'/api/ocean/transect?date={today}&path={route}&format=bin'),
+        ('zonal grid1deg', f'/api/ocean/zonal?date={today}&zones=grid1deg&dataset=waves'),
+        ('bundle', f'/api/ocean/bundle?date={today}&layers=temperature,currents,salinity'),
+        ('bundle bin', f'/api/ocean/bundle?date={today}&layers=temperature,currents,salinity&format=bin'),
+        ('tile sst z7', f'/api/ocean/tiles/sst/7/92/61.png?date={today}'),
+        ('profile point', f'/api/ocean/profile?date={today}&lat=6.93&lon=79.80&max_depth=500'),
+        ('profile section', f'/api/ocean/profile?date={today}&points={section}&max_depth=500'),
+        ('timeseries 1y', f'/api/ocean/timeseries?lat=6.93&lon=79.80&start_date={year_ago}&end_date={today}'),
+    ]
+
+
+class InProcessClient:
+    """Calls the Flask app directly (one test client per thread)"""
+
+    def __init__(self):
+        import copernicus_flask_api
+        self.api = copernicus_flask_api
+        # Per-request fetch logging would dominate the measurements
+        logging.getLogger().setLevel(logging.WARNING)
+        self.seed_archive()
+
+    def seed_archive(self):
+        """Archive the last ARCHIVE_SEED_DAYS temperature days (already archived days are skipped)"""
+        from ingest_ocean_archive import ingest
+        today = datetime.now()
+        first = today - timedelta(days=ARCHIVE_SEED_DAYS - 1)
+        ingest('temperature', self.api.date_range(first.strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')))
+
+    def get(self, path):
+        response = self.api.app.test_client().get(path)
+        return response.status_code, len(response.get_data())
+
+    def clear_cache(self):
+        self.api.cube_cache.clear()
+        self.api.tile_cache = type(self.api.tile_cache)(ttl=self.api.CACHE_DURATION)
+
+    def cache_stats(self):
+        return self.api.cube_cache.snapshot()
+
+
+class HttpClient:
+    """Calls a running server over HTTP"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def get(self, path):
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=120) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+    def clear_cache(self):
+        raise SystemExit('--cold is only supported for in-process runs')
+
+    def cache_stats(self):
+        with urllib.request.urlopen(self.base_url + '/api/cache/stats', timeout=30) as response:
+            return json.loads(response.read())['cubes']
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / 1024 if sys.platform != 'darwin' else peak / (1024 * 1024)
+
+
+def run_scenario(client, path, requests, concurrency):
+    """Issue requests with the given concurrency and collect latencies"""
+    def one(_):
+        started = time.perf_counter()
+        status, size = client.get(path)
+        return time.perf_counter() - started, status, size
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    errors = sum(1 for r in results if r[1] >= 400)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+        'throughput_rps': requests / elapsed,
+        'bytes': int(np.median([r[2] for r in results]))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load benchmark for the NARA ocean API')
+    parser.add_argument('--url', help='Benchmark a running server instead of the in-process app')
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='Concurrent clients (default 8)')
+    parser.add_argument('-n', '--requests', type=int, default=200, help='Requests per scenario (default 200)')
+    parser.add_argument('--cold', action='store_true', help='Clear the caches before each scenario')
+    parser.add_argument('--only', help='Only run scenarios whose name contains this text')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    client = HttpClient(args.url) if args.url else InProcessClient()
+    scenarios = [s for s in build_scenarios() if not args.only or args.only in s[0]]
+
+    print(f"{'scenario':<28}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'bytes':>10}{'err':>5}")
+    results = {}
+    for name, path in scenarios:
+        if args.cold:
+            client.clear_cache()
+        else:
+            client.get(path)  # warm the cache so the run measures serving cost
+        result = run_scenario(client, path, args.requests, args.concurrency)
+        results[name] = result
+        print(f"{name:<28}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+              f"{result['throughput_rps']:>9.0f}{result['bytes']:>10}{result['errors']:>5}")
+
+    summary = {
+        'mode': 'http' if args.url else 'in-process',
+        'data_source': os.environ.get('OCEAN_DATA_SOURCE'),
+        'concurrency': args.concurrency,
+        'cold': args.cold,
+        'peak_rss_mb': None if args.url else peak_rss_mb(),
+        'cache': client.cache_stats(),
+        'scenarios': results
+    }
+    if summary['peak_rss_mb'] is not None:
+        print(f"\nPeak RSS: {summary['peak_rss_mb']:.0f} MB")
+    print(f"Cube cache resident: {summary['cache']['memory_bytes'] / 1e6:.1f} MB in memory, "
+          f"{summary['cache']['disk_bytes'] / 1e6:.1f} MB on disk")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,16 +4,35 @@ NARA Copernicus Marine Data API Backend
 Flask server for fetching live ocean data from Copernicus Marine Service
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from datetime import datetime, timedelta
-import copernicusmarine
 import pandas as pd
 import numpy as np
 import logging
+import math
 import os
-from functools import lru_cache
 import json
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from ocean_archive import OceanArchive
+from ocean_cache import (DiskCubeCache, FailureCache, Revalidator, SingleFlight, attach_result, clear_results,
+                         make_cache_key)
+from ocean_climatology import Climatology, calendar_slot
+from ocean_encoding import BINARY_MIMETYPE, encode_arrays, pack_values, parse_encoding, wants_binary
+from ocean_fronts import detect_fronts
+from ocean_grid import (axis_spec, bbox_slices, build_pyramid, path_distances, resample_path, sample_points,
+                        slice_cube)
+from ocean_metrics import SIZE_BUCKETS, MetricsRegistry
+from ocean_prefetch import PrefetchScheduler
+from ocean_sources import make_source
+from ocean_tiles import BLANK_TILE, TileCache, build_lut, render_tile, encode_png, tile_bounds, tiles_covering
+from ocean_vectors import STREAMLINE_METHODS, arrow_features, trace_streamlines
+from ocean_zones import ZoneSets, zonal_stats
 
 # Configure logging
 logging.basicConfig(
@@ -42,34 +61,309 @@ DATASETS = {
     'salinity': 'cmems_mod_glo_phy-so_anfc_0.083deg_P1D-m'
 }
 
+# Variables fetched for each dataset type
+DATASET_VARIABLES = {
+    'temperature': ('thetao',),
+    'currents': ('uo', 'vo'),
+    'waves': ('VHM0', 'VMDR', 'VTPK'),
+    'salinity': ('so',)
+}
+
 # Cache duration: 1 hour (3600 seconds)
 CACHE_DURATION = 3600
 
+# Upstream fetches that can run in parallel (historical days, bundle layers)
+FETCH_WORKERS = int(os.environ.get('OCEAN_FETCH_WORKERS', 4))
 
-@lru_cache(maxsize=100)
-def fetch_copernicus_data(dataset_id, variables, start_date, end_date, depth=0):
+# Historical queries are cached per day; missing days are fetched in parallel
+HISTORICAL_MAX_DAYS = 366
+
+# Point time series are read from the local archive only (about 30 years)
+TIMESERIES_MAX_DAYS = 11000
+
+# Earlier days tried when today's product is not available yet
+FALLBACK_DAYS = 3
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Level-of-detail pyramid: level n is the native grid mean-pooled by LOD_FACTORS[n]
+LOD_FACTORS = (1, 2, 4, 8)
+
+# Angles in degrees, pooled with a circular mean
+DIRECTION_VARIABLES = ('VMDR', 'direction')
+
+# Raster tile layers: source dataset/variable and colour scale
+TILE_LAYERS = {
+    'sst': {'dataset': 'temperature', 'variable': 'thetao', 'vmin': 24.0, 'vmax': 32.0,
+            'colormap': 'thermal', 'units': '°C'},
+    'salinity': {'dataset': 'salinity', 'variable': 'so', 'vmin': 32.0, 'vmax': 36.0,
+                 'colormap': 'haline', 'units': 'PSU'},
+    'waves': {'dataset': 'waves', 'variable': 'VHM0', 'vmin': 0.0, 'vmax': 4.0,
+              'colormap': 'waves', 'units': 'm'}
+}
+TILE_MAX_ZOOM = 12
+TILE_PRERENDER_ZOOMS = (5, 6, 7, 8)
+# Tiles drawn from a stale or earlier-day cube are kept (and may be cached by
+# browsers/CDNs) only briefly, so the requested day replaces them once it arrives
+STALE_TILE_TTL = 60
+
+# Standardized SST anomaly: cells whose climatological spread is smaller than
+# this (constant or single-sample cells) have no meaningful z-score
+CLIMATOLOGY_MIN_STD = 0.01  # °C
+
+# Thermal fronts (potential fishing zones): SST gradient threshold and smallest region
+FRONT_THRESHOLD = 0.03  # °C/km
+FRONT_MIN_CELLS = 3
+GEOJSON_MIMETYPE = 'application/geo+json'
+
+# Current arrows/streamlines: map zoom showing the native grid (one LOD level
+# coarser per zoom level out) and the streamline tracer settings per level
+VECTOR_NATIVE_ZOOM = 9
+ARROW_REFERENCE_SPEED = 1.0  # m/s drawn as a full-cell arrow
+STREAMLINE_SEED_SPACING = 2  # cells between seeds
+STREAMLINE_STEP = 0.5  # cells per integration step
+STREAMLINE_MAX_STEPS = 30
+
+# Transects: sample spacing default and the most samples along one route
+TRANSECT_SPACING_KM = 5.0
+TRANSECT_MAX_SAMPLES = 5000
+TRANSECT_DATASETS = ('temperature', 'currents', 'waves')
+
+# Zonal statistics: default percentiles and the most a request may ask for
+ZONAL_PERCENTILES = (10.0, 50.0, 90.0)
+ZONAL_MAX_PERCENTILES = 9
+
+# Field selection (?fields=) for the live grid endpoints: response parts and the
+# reductions a client can ask for instead of the values grid. Reductions are
+# kept per grid view (level/bbox/time steps) with the cached cube, up to
+# REDUCTION_CACHE_MAX values per cube.
+FIELD_PARTS = ('values', 'coordinates')
+REDUCTIONS = ('min', 'max', 'mean', 'std', 'count')
+FIELD_ALIASES = {'stats': ('min', 'max', 'mean')}
+REDUCTION_CACHE_MAX = 1024
+
+# Depth profiles: datasets with depth levels and the column depths fetched for them.
+# A request uses the shallowest column reaching its max_depth, so nearby
+# max_depth values share one cached 3-D cube.
+PROFILE_DATASETS = ('temperature', 'currents', 'salinity')
+PROFILE_COLUMN_DEPTHS = (100.0, 300.0, 600.0, 1100.0, 2000.0, 5800.0)
+PROFILE_UNITS = {'temperature': '°C', 'currents': 'm/s', 'salinity': 'PSU'}
+
+
+# Upstream data source (OCEAN_DATA_SOURCE=copernicus or local)
+data_source = make_source()
+
+# Shared on-disk cube cache (survives restarts, shared across gunicorn workers)
+cube_cache = DiskCubeCache(ttl=CACHE_DURATION)
+
+# Concurrent misses for the same cube share a single upstream request
+upstream_fetches = SingleFlight()
+
+# Failed fetches fail fast for a short while instead of being retried per request
+failed_fetches = FailureCache()
+
+# Stale cubes are served immediately and refreshed here, off the request threads
+revalidator = Revalidator()
+
+# Local archive of daily surface cubes, filled by ingest_ocean_archive.py
+ocean_archive = OceanArchive()
+
+# Day-of-year SST climatology, updated by the same ingestion job
+sst_climatology = Climatology(os.path.join(ocean_archive.root, 'temperature', 'climatology'), 'thetao')
+
+# Zone sets (districts, EEZ) for zonal statistics, rasterized once per grid
+zone_sets = ZoneSets()
+
+# Rendered PNG tiles, refreshed together with the cubes they come from
+tile_cache = TileCache(max_entries=int(os.environ.get('OCEAN_TILE_CACHE_ENTRIES', 2048)), ttl=CACHE_DURATION)
+tile_luts = {name: build_lut(layer['colormap']) for name, layer in TILE_LAYERS.items()}
+
+# Worker threads for concurrent cube fetches
+fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='ocean-fetch')
+
+# Prometheus metrics, exposed on /api/metrics (per worker process)
+metrics = MetricsRegistry()
+request_seconds = metrics.histogram(
+    'ocean_http_request_duration_seconds',
+    'Request latency per route (streamed responses until the last chunk)',
+    ('route', 'method', 'status')
+)
+response_bytes = metrics.histogram(
+    'ocean_http_response_bytes', 'Response body size per route', ('route',), buckets=SIZE_BUCKETS
+)
+upstream_seconds = metrics.histogram(
+    'ocean_upstream_open_dataset_seconds', 'Upstream open_dataset and download time', ('dataset',)
+)
+conversion_seconds = metrics.histogram(
+    'ocean_array_conversion_seconds',
+    'NumPy conversion time (float32: upstream arrays to cube, to_json: cube to lists)',
+    ('step',)
+)
+serialization_seconds = metrics.histogram(
+    'ocean_serialization_seconds', 'Response body encoding time', ('format',)
+)
+metrics.gauge(
+    'ocean_cube_cache_lookups_total', 'Cube cache lookups by result',
+    lambda: {result: cube_cache.snapshot()[result]
+             for result in ('memory_hits', 'disk_hits', 'stale_hits', 'misses', 'expired')},
+    labelname='result', kind='counter'
+)
+metrics.gauge('ocean_cube_cache_hit_ratio', 'Share of cube lookups served from cache',
+              lambda: cube_cache.snapshot()['hit_ratio'])
+metrics.gauge(
+    'ocean_cube_cache_bytes', 'Resident cube cache size by tier',
+    lambda: {tier: cube_cache.snapshot()[f'{tier}_bytes'] for tier in ('memory', 'disk')},
+    labelname='tier'
+)
+metrics.gauge('ocean_upstream_in_flight', 'Upstream fetches currently running',
+              lambda: upstream_fetches.in_flight())
+metrics.gauge(
+    'ocean_upstream_calls_total', 'Cube fetch calls by outcome (coalesced calls shared another fetch)',
+    lambda: {outcome: upstream_fetches.snapshot()[outcome]
+             for outcome in ('executed', 'coalesced', 'errors')},
+    labelname='outcome', kind='counter'
+)
+metrics.gauge(
+    'ocean_failure_cache_total', 'Failed cube fetches remembered, and requests they failed fast',
+    lambda: {event: failed_fetches.snapshot()[event] for event in ('recorded', 'hits')},
+    labelname='event', kind='counter'
+)
+metrics.gauge(
+    'ocean_revalidations_total', 'Background refreshes of stale cubes by outcome',
+    lambda: {outcome: revalidator.snapshot()[outcome] for outcome in ('submitted', 'refreshed', 'failed')},
+    labelname='outcome', kind='counter'
+)
+metrics.gauge(
+    'ocean_tile_cache_total', 'Tile cache lookups and renders',
+    lambda: {event: tile_cache.snapshot()[event] for event in ('hits', 'misses', 'rendered')},
+    labelname='event', kind='counter'
+)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Default Flask JSON provider that records serialization time"""
+
+    def dumps(self, obj, **kwargs):
+        with serialization_seconds.time(format='json'):
+            return super().dumps(obj, **kwargs)
+
+
+app.json = TimedJSONProvider(app)
+
+
+def _to_float32(data_array, var):
+    """Coerce a raw variable array to float32, keeping NaN for missing cells"""
+    # Handle object dtype by converting to float
+    if data_array.dtype == 'O':  # Object dtype
+        logger.info(f"Converting object dtype to numeric for variable: {var}")
+        # Flatten, convert to numeric, then reshape
+        original_shape = data_array.shape
+        flat_array = data_array.flatten()
+        # Convert to numeric, coercing errors to NaN
+        numeric_array = pd.to_numeric(flat_array, errors='coerce')
+        data_array = numeric_array.values.reshape(original_shape)
+        logger.info(f"Converted to dtype: {data_array.dtype}")
+
+    # Ensure we have a numeric array before nan operations
+    if not np.issubdtype(data_array.dtype, np.number):
+        logger.warning(f"Variable {var} has non-numeric dtype {data_array.dtype}, attempting conversion")
+        data_array = data_array.astype(float)
+
+    return np.asarray(data_array, dtype=np.float32)
+
+
+def fetch_ocean_cube(dataset_id, variables, start_date, end_date, depth=0, refresh=False, max_depth=None):
     """
-    Fetch data from Copernicus Marine Service with caching
+    Fetch a data cube from Copernicus Marine Service, using the shared cube cache
 
     Args:
         dataset_id: Copernicus dataset identifier
-        variables: Tuple of variable names (must be tuple for caching)
+        variables: Tuple of variable names
         start_date: Start date string (YYYY-MM-DD)
         end_date: End date string (YYYY-MM-DD)
         depth: Depth level in meters (default 0 for surface)
+        refresh: Skip the cache lookup and re-download (used by the prefetcher)
+        max_depth: Fetch every depth level from depth down to max_depth in one
+                   upstream call instead of the single level at depth
+
+    A cube past its TTL is returned as it is (cube_cache.is_stale tells) while
+    a background refresh fetches the new one. A cube whose fetch failed within
+    the last few minutes fails fast with the same error.
 
     Returns:
-        Dictionary containing processed ocean data
+        Dictionary with float32 'variables' arrays (NaN where missing),
+        float32 'derived' arrays (see derived_fields),
+        'latitude'/'longitude' arrays and a 'time' list of strings
     """
+    key = cube_key(dataset_id, variables, start_date, end_date, depth, max_depth)
+
+    def download():
+        return upstream_fetches.do(
+            key, lambda: _download_cube(key, dataset_id, variables, start_date, end_date, depth, refresh, max_depth)
+        )
+
+    if not refresh:
+        cube = cube_cache.get(key, stale=True)
+        if cube is not None:
+            if cube_cache.is_stale(cube) and failed_fetches.get(key, record=False) is None:
+                revalidator.submit(key, download)
+            return cube
+
+        failure = failed_fetches.get(key)
+        if failure is not None:
+            message, retry_in = failure
+            raise RuntimeError(f"{message} (upstream retry in {retry_in:.0f}s)")
+
+    return download()
+
+
+def cube_key(dataset_id, variables, start_date, end_date, depth=0, max_depth=None):
+    """Cache key of a fetched cube"""
+    parts = [dataset_id, tuple(variables), start_date, end_date, float(depth)]
+    if max_depth is not None:
+        parts.append(float(max_depth))
+    return make_cache_key(*parts)
+
+
+def _download_cube(key, dataset_id, variables, start_date, end_date, depth, refresh=False, max_depth=None):
+    """Open the dataset upstream and store the resulting cube in the cache"""
+    # Another caller may have finished the same fetch just before we started
+    if not refresh:
+        cube = cube_cache.get(key, record=False)
+        if cube is not None:
+            return cube
+
     try:
-        logger.info(f"Fetching {dataset_id} for {start_date} to {end_date}")
+        cube = read_source_cube(dataset_id, variables, start_date, end_date, depth, max_depth)
+    except Exception as e:
+        logger.error(f"Error fetching data from Copernicus: {str(e)}")
+        failed_fetches.add(key, e)
+        raise
 
-        # Adjust depth to match dataset constraints
-        # Dataset minimum depth is ~0.494m, so map 0 to 0.5
-        actual_depth = max(0.5, depth) if depth < 0.5 else depth
+    failed_fetches.discard(key)
+    cube_cache.put(key, cube)
+    return cube
 
-        # Fetch data using copernicusmarine Python library
-        dataset = copernicusmarine.open_dataset(
+
+def read_source_cube(dataset_id, variables, start_date, end_date, depth=0, max_depth=None):
+    """
+    Open a cube from the data source without touching the cube cache
+
+    Used directly by the archive ingestion, so backfills neither evict the
+    live cubes nor archive a cached (possibly stale, forecast) day.
+    """
+    logger.info(f"Fetching {dataset_id} for {start_date} to {end_date}")
+
+    # Adjust depth to match dataset constraints
+    # Dataset minimum depth is ~0.494m, so map 0 to 0.5
+    actual_depth = max(0.5, depth) if depth < 0.5 else depth
+    # Single level by default, or the whole column down to max_depth
+    deepest = actual_depth + 1.0 if max_depth is None else max(max_depth, actual_depth + 1.0)
+
+    # Fetch data from the configured source (copernicusmarine by default).
+    # open_dataset is lazy, so load inside the timer to count the download as upstream time
+    with upstream_seconds.time(dataset=dataset_id):
+        dataset = data_source.open_dataset(
             dataset_id=dataset_id,
             variables=list(variables),
             minimum_longitude=SRI_LANKA_BOUNDS['min_lon'],
@@ -79,57 +373,789 @@ def fetch_copernicus_data(dataset_id, variables, start_date, end_date, depth=0):
             start_datetime=start_date,
             end_datetime=end_date,
             minimum_depth=actual_depth,
-            maximum_depth=actual_depth + 1.0
-        )
-
-        # Convert to dict for JSON serialization
-        data_dict = {}
+            maximum_depth=deepest
+        ).load()
 
+    cube = {'variables': {}}
+    with conversion_seconds.time(step='float32'):
         for var in variables:
             if var in dataset.variables:
                 logger.info(f"Processing variable: {var}, dtype: {dataset[var].dtype}")
-                data_array = dataset[var].values
-
-                # Handle object dtype by converting to float
-                if data_array.dtype == 'O':  # Object dtype
-                    logger.info(f"Converting object dtype to numeric for variable: {var}")
-                    # Flatten, convert to numeric, then reshape
-                    original_shape = data_array.shape
-                    flat_array = data_array.flatten()
-                    # Convert to numeric, coercing errors to NaN
-                    numeric_array = pd.to_numeric(flat_array, errors='coerce')
-                    data_array = numeric_array.values.reshape(original_shape)
-                    logger.info(f"Converted to dtype: {data_array.dtype}")
-
-                # Ensure we have a numeric array before nan operations
-                if not np.issubdtype(data_array.dtype, np.number):
-                    logger.warning(f"Variable {var} has non-numeric dtype {data_array.dtype}, attempting conversion")
-                    data_array = data_array.astype(float)
-
-                # Handle NaN values - replace NaN with 0.0
-                data_array = np.nan_to_num(data_array, nan=0.0)
-
-                data_dict[var] = {
-                    'values': data_array.tolist(),
-                    'shape': list(data_array.shape),
-                    'min': float(np.nanmin(data_array)) if not np.all(np.isnan(data_array)) else None,
-                    'max': float(np.nanmax(data_array)) if not np.all(np.isnan(data_array)) else None,
-                    'mean': float(np.nanmean(data_array)) if not np.all(np.isnan(data_array)) else None
-                }
+                cube['variables'][var] = _to_float32(dataset[var].values, var)
+        cube['derived'] = derived_fields(cube['variables'])
+
+    cube['latitude'] = np.asarray(dataset.latitude.values, dtype=np.float64)
+    cube['longitude'] = np.asarray(dataset.longitude.values, dtype=np.float64)
+    cube['time'] = [str(t) for t in pd.to_datetime(dataset.time.values)]
+    if 'depth' in dataset.coords:
+        cube['depth'] = np.asarray(dataset.depth.values, dtype=np.float64)
+
+    logger.info(f"Successfully fetched {dataset_id}")
+    return cube
+
+
+def fetch_latest_cube(dataset_id, variables, start_date, end_date, depth=0, max_depth=None):
+    """
+    Fetch a single-day cube, or the newest earlier day when it is unavailable
+
+    When the requested day cannot be fetched (product not published yet,
+    upstream down), the newest of the previous FALLBACK_DAYS days already in
+    the cube cache (stale or not) or the local archive is used; failing that,
+    the previous day is fetched upstream.
+
+    Returns:
+        (date of the cube, cube)
+    """
+    fetch_args = dict(dataset_id=dataset_id, variables=variables, depth=depth, max_depth=max_depth)
+    try:
+        return start_date, fetch_ocean_cube(start_date=start_date, end_date=end_date, **fetch_args)
+    except Exception as e:
+        if end_date != start_date:
+            raise
+        error = e
+
+    day = datetime.strptime(start_date, '%Y-%m-%d')
+    earlier = [(day - timedelta(days=n)).strftime('%Y-%m-%d') for n in range(1, FALLBACK_DAYS + 1)]
+    for date_str in earlier:
+        cube = stored_day_cube(date_str, **fetch_args)
+        if cube is not None:
+            break
+    else:
+        date_str = earlier[0]
+        try:
+            cube = fetch_ocean_cube(start_date=date_str, end_date=date_str, **fetch_args)
+        except Exception:
+            raise error
+
+    logger.warning(f"Serving {dataset_id} for {date_str} instead of {start_date}: {str(error)}")
+    return date_str, cube
+
+
+def stored_day_cube(date_str, dataset_id, variables, depth=0, max_depth=None):
+    """A day's cube from the cube cache (including stale entries) or the archive, without going upstream"""
+    cube = cube_cache.get(cube_key(dataset_id, variables, date_str, date_str, depth, max_depth),
+                          record=False, stale=True)
+    if cube is not None or depth != 0 or max_depth is not None:
+        return cube
+
+    name = next((name for name, archived_id in DATASETS.items() if archived_id == dataset_id), None)
+    archived = ocean_archive.read_days(name, [date_str]).get(date_str) if name else None
+    if archived is None or not set(variables) <= set(archived['variables']):
+        return None
+    archived['variables'] = {var: archived['variables'][var] for var in variables}
+    return archived
+
+
+def freshness_metadata(cube, requested_date, date_str):
+    """
+    'stale' flag and the date actually served, for the metadata of live responses
+
+    A cube is stale when it is past its cache TTL (a refresh is running) or
+    comes from an earlier day than requested ('requested_date' is then set).
+    """
+    info = {'date': date_str, 'stale': date_str != requested_date or cube_cache.is_stale(cube)}
+    if date_str != requested_date:
+        info['requested_date'] = requested_date
+    return info
+
+
+def fetch_copernicus_data(dataset_id, variables, start_date, end_date, depth=0):
+    """
+    Fetch data from Copernicus Marine Service with caching
+
+    Args:
+        dataset_id: Copernicus dataset identifier
+        variables: Tuple of variable names
+        start_date: Start date string (YYYY-MM-DD)
+        end_date: End date string (YYYY-MM-DD)
+        depth: Depth level in meters (default 0 for surface)
 
-        # Extract coordinates
+    Returns:
+        Dictionary containing processed ocean data
+    """
+    cube = fetch_ocean_cube(dataset_id, variables, start_date, end_date, depth)
+    return cube_to_dict(cube)
+
+
+@conversion_seconds.time(step='to_json')
+def cube_to_dict(cube, include_coordinates=True, nullable=False):
+    """
+    Convert a cube to the JSON structure returned by the grid endpoints
+
+    Missing cells are 0 in 'values', or null with nullable=True for grids
+    where 0 is a meaningful value (anomalies); min/max/mean ignore them.
+    """
+    # Convert to dict for JSON serialization
+    data_dict = {}
+
+    for var, data_array in cube['variables'].items():
+        if nullable:
+            values = np.where(np.isnan(data_array), None, data_array).tolist()
+        else:
+            values = np.nan_to_num(data_array, nan=0.0).tolist()
+
+        # Statistics skip missing cells (as ?fields= reductions and binary stats do)
+        data_dict[var] = dict(values=values, shape=list(data_array.shape), **array_stats(data_array))
+
+    # Extract coordinates
+    if include_coordinates:
         data_dict['coordinates'] = {
-            'latitude': dataset.latitude.values.tolist(),
-            'longitude': dataset.longitude.values.tolist(),
-            'time': [str(t) for t in pd.to_datetime(dataset.time.values)]
+            'latitude': cube['latitude'].tolist(),
+            'longitude': cube['longitude'].tolist(),
+            'time': list(cube['time'])
         }
 
-        logger.info(f"Successfully fetched {dataset_id}")
-        return data_dict
+    return data_dict
+
+
+def date_range(start_date, end_date):
+    """List of YYYY-MM-DD strings from start_date to end_date inclusive"""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    if end < start:
+        raise ValueError('end_date must not be before start_date')
+    return [(start + timedelta(days=n)).strftime('%Y-%m-%d') for n in range((end - start).days + 1)]
+
+
+def iter_day_cubes(dataset_id, variables, dates, depth=0, archive_name=None, use_cache=True):
+    """
+    Yield (date, cube, error) for each date, in order
+
+    Surface days already in the local archive (when archive_name is given)
+    are read from it a time segment at a time as the generator advances
+    (see OceanArchive.iter_days). Every other day is its own cache entry, so
+    overlapping ranges share work and only missing days go upstream. Up to
+    2 * FETCH_WORKERS days are fetched ahead in parallel, which keeps memory
+    bounded on long ranges. With use_cache=False every day is read fresh from
+    the data source and nothing is written to the cube cache (ingestion).
+    """
+    fetch = fetch_ocean_cube if use_cache else read_source_cube
+    if archive_name and depth == 0:
+        archived = ocean_archive.has_days(archive_name, dates)
+    else:
+        archived = [False] * len(dates)
+    from_archive = ocean_archive.iter_days(archive_name, [d for d, ok in zip(dates, archived) if ok])
+    remaining = iter([d for d, ok in zip(dates, archived) if not ok])
+    pending = deque()
+
+    def submit_next():
+        date_str = next(remaining, None)
+        if date_str is not None:
+            pending.append((date_str, fetch_pool.submit(
+                fetch, dataset_id, variables, date_str, date_str, depth
+            )))
+
+    for _ in range(FETCH_WORKERS * 2):
+        submit_next()
+
+    for date_str, in_archive in zip(dates, archived):
+        if in_archive:
+            yield date_str, next(from_archive)[1], None
+            continue
+        _, future = pending.popleft()
+        submit_next()
+        try:
+            yield date_str, future.result(), None
+        except Exception as e:
+            yield date_str, None, e
+
+
+def concat_cubes(cubes):
+    """Join day cubes along the time axis into one cube"""
+    first = cubes[0]
+    return {
+        'variables': {
+            var: np.concatenate([cube['variables'][var] for cube in cubes], axis=0)
+            for var in first['variables']
+        },
+        'latitude': first['latitude'],
+        'longitude': first['longitude'],
+        'time': [t for cube in cubes for t in cube['time']]
+    }
+
+
+def array_stats(data_array):
+    """NaN-aware min/max/mean of an array (None when there is no valid cell)"""
+    return array_reductions(data_array, ('min', 'max', 'mean'))
+
+
+def current_speed_direction(u_values, v_values):
+    """Current speed (m/s) and direction (degrees from north) from U/V components"""
+    # Speed (magnitude)
+    speed = np.sqrt(u_values**2 + v_values**2)
+
+    # Direction (degrees from north)
+    direction = np.degrees(np.arctan2(u_values, v_values)) % 360
+
+    return speed, direction
+
+
+def derived_fields(variables):
+    """Fields computed once from a cube's raw variables (current speed and direction)"""
+    if 'uo' in variables and 'vo' in variables:
+        speed, direction = current_speed_direction(variables['uo'], variables['vo'])
+        return {'speed': speed, 'direction': direction}
+    return {}
+
+
+def cube_derived(cube):
+    """Derived fields of a cube, computed on first use for cubes cached without them"""
+    derived = cube.get('derived')
+    if derived is None:
+        derived = cube['derived'] = derived_fields(cube['variables'])
+    return derived
+
+
+@conversion_seconds.time(step='to_json')
+def derived_to_dict(derived):
+    """JSON entries for the derived current fields (NaN shown as 0 like the raw grids)"""
+    data = {}
+    if 'speed' in derived:
+        data['speed'] = dict(values=np.nan_to_num(derived['speed'], nan=0.0).tolist(), units='m/s',
+                             **array_stats(derived['speed']))
+    if 'direction' in derived:
+        data['direction'] = {
+            'values': np.nan_to_num(derived['direction'], nan=0.0).tolist(),
+            'units': 'degrees'
+        }
+    return data
+
+
+def cube_pyramid(cube):
+    """All LOD levels of a cube, built once and kept alongside the cached cube"""
+    pyramid = cube.get('pyramid')
+    if pyramid is None:
+        pyramid = build_pyramid(cube, LOD_FACTORS, DIRECTION_VARIABLES)
+        # Derive coarse levels from their pooled components, not by pooling speed
+        for coarse in pyramid[1:]:
+            coarse['derived'] = derived_fields(coarse['variables'])
+        cube['pyramid'] = pyramid
+        if 'key' in cube:
+            cube_cache.resize(cube['key'])
+    return pyramid
+
+
+def parse_lod_args(args):
+    """
+    Read ?level= / ?max_cells= from the query string
+
+    Returns:
+        (level or None, max_cells or None); raises ValueError when invalid
+    """
+    level = args.get('level')
+    max_cells = args.get('max_cells')
+
+    if level is not None:
+        level = int(level)
+        if not 0 <= level < len(LOD_FACTORS):
+            raise ValueError(f'level must be between 0 and {len(LOD_FACTORS) - 1}')
+    if max_cells is not None:
+        max_cells = int(max_cells)
+        if max_cells <= 0:
+            raise ValueError('max_cells must be positive')
+
+    return level, max_cells
+
+
+def parse_bbox(args):
+    """
+    Read ?bbox=minLon,minLat,maxLon,maxLat from the query string
+
+    Returns:
+        Bounds dict like SRI_LANKA_BOUNDS, or None; raises ValueError when the
+        box is malformed or not inside the cached Sri Lanka region
+    """
+    bbox_str = args.get('bbox')
+    if not bbox_str:
+        return None
+
+    parts = [float(v) for v in bbox_str.split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox must be minLon,minLat,maxLon,maxLat')
+
+    bbox = {'min_lon': parts[0], 'min_lat': parts[1], 'max_lon': parts[2], 'max_lat': parts[3]}
+    if bbox['min_lon'] > bbox['max_lon'] or bbox['min_lat'] > bbox['max_lat']:
+        raise ValueError('bbox minimum must not exceed maximum')
+    if not (SRI_LANKA_BOUNDS['min_lon'] <= bbox['min_lon'] and bbox['max_lon'] <= SRI_LANKA_BOUNDS['max_lon'] and
+            SRI_LANKA_BOUNDS['min_lat'] <= bbox['min_lat'] and bbox['max_lat'] <= SRI_LANKA_BOUNDS['max_lat']):
+        raise ValueError('bbox must lie within Sri Lanka maritime boundaries')
+
+    return bbox
+
+
+def select_level(cube, level=None, max_cells=None, bbox=None):
+    """
+    Pick a pyramid level by explicit level or by a lat x lon cell budget,
+    then cut it down to the optional bounding box
+
+    Returns:
+        (level, cube at that level); the native cube when neither is given
+    """
+    if level is None and max_cells is None:
+        level = 0
+        selected = cube
+    else:
+        pyramid = cube_pyramid(cube)
+        if level is None:
+            level = len(pyramid) - 1
+            for n, candidate in enumerate(pyramid):
+                lat_slice, lon_slice = (slice(None), slice(None))
+                if bbox:
+                    lat_slice, lon_slice = bbox_slices(candidate['latitude'], candidate['longitude'], bbox)
+                n_cells = len(candidate['latitude'][lat_slice]) * len(candidate['longitude'][lon_slice])
+                if n_cells <= max_cells:
+                    level = n
+                    break
+        selected = pyramid[level]
+
+    if bbox:
+        selected = slice_cube(selected, bbox)
+
+    return level, selected
+
+
+def parse_time_args(args, times):
+    """
+    Read ?time= / ?step= (time-axis selection) for a cube's time list
+
+    time picks the nearest time step to a timestamp ("2025-10-24T06:00", UTC
+    unless it has an offset, or just "06:00" on the cube's day); step is an index or a start:stop[:stride]
+    slice, so clients can page through the time axis.
+
+    Returns:
+        slice of the time axis (all steps when neither is given); raises
+        ValueError when invalid
+    """
+    time_str = args.get('time')
+    step_str = args.get('step')
+    if time_str and step_str:
+        raise ValueError('use either time or step, not both')
+
+    if time_str:
+        stamps = pd.to_datetime(times)
+        if re.fullmatch(r'\d{1,2}(:\d{2})?', time_str):
+            hours, _, minutes = time_str.partition(':')
+            target = stamps[0].normalize() + pd.Timedelta(hours=int(hours), minutes=int(minutes or 0))
+        else:
+            target = pd.Timestamp(time_str)
+            # Cube times are naive UTC
+            if target.tzinfo is not None:
+                target = target.tz_convert('UTC').tz_localize(None)
+        gaps = np.abs((stamps - target).total_seconds())
+        index = int(np.argmin(gaps))
+        tolerance = (stamps[-1] - stamps[0]).total_seconds() / (len(stamps) - 1) if len(stamps) > 1 else 86400
+        if gaps[index] > tolerance:
+            raise ValueError(f'time {time_str} is outside {times[0]} to {times[-1]}')
+        return slice(index, index + 1)
+
+    if step_str:
+        parts = step_str.split(':')
+        if len(parts) == 1:
+            index = int(step_str)
+            if not -len(times) <= index < len(times):
+                raise ValueError(f'step must be between 0 and {len(times) - 1}')
+            index %= len(times)
+            return slice(index, index + 1)
+        if len(parts) > 3:
+            raise ValueError('step must be an index or start:stop[:stride]')
+        selected = slice(*(int(part) if part else None for part in parts))
+        if selected.step is not None and selected.step <= 0:
+            raise ValueError('step stride must be positive')
+        if not range(len(times))[selected]:
+            raise ValueError(f'step {step_str} selects no time steps')
+        return selected
+
+    return slice(None)
+
+
+def slice_times(cube, selected):
+    """Time steps of a cube as array views (no copy)"""
+    if selected == slice(None):
+        return cube
+    sliced = {
+        'variables': {var: values[selected] for var, values in cube['variables'].items()},
+        'latitude': cube['latitude'],
+        'longitude': cube['longitude'],
+        'time': cube['time'][selected]
+    }
+    if 'depth' in cube:
+        sliced['depth'] = cube['depth']
+    if 'derived' in cube:
+        sliced['derived'] = {name: values[selected] for name, values in cube['derived'].items()}
+    return sliced
+
+
+def parse_fields(args):
+    """
+    Read ?fields= (comma-separated response parts and reductions) from the query string
+
+    'stats' stands for min,max,mean, e.g. fields=stats for a dashboard card or
+    fields=values,coordinates for the grid without statistics.
+
+    Returns:
+        Tuple of FIELD_PARTS/REDUCTIONS names in request order, or None for
+        the full response; raises ValueError on an unknown field
+    """
+    fields_str = args.get('fields')
+    if not fields_str:
+        return None
+
+    fields = []
+    for name in (part.strip() for part in fields_str.split(',')):
+        expanded = FIELD_ALIASES.get(name, (name,))
+        for field in expanded:
+            if field not in FIELD_PARTS + REDUCTIONS:
+                raise ValueError(f'unknown field {name!r} (choose from '
+                                 f'{", ".join(FIELD_PARTS + REDUCTIONS + tuple(FIELD_ALIASES))})')
+            if field not in fields:
+                fields.append(field)
+    return tuple(fields)
+
+
+def array_reductions(data_array, reductions):
+    """NaN-aware reductions of an array by name (None when there is no valid cell)"""
+    valid = data_array[~np.isnan(data_array)]
+    result = {}
+    for name in reductions:
+        if name == 'count':
+            result[name] = int(valid.size)
+        else:
+            result[name] = float(getattr(np, name)(valid)) if valid.size else None
+    return result
+
+
+def cube_reductions(source, cube, name, values, reductions):
+    """
+    Reductions of one grid of a view of a cached cube, computed once per view
+    and kept with the cached (source) cube
+
+    The view is identified by its grid and time steps, so any request that
+    selects the same cells (level, bbox, time) shares the results.
+    """
+    view = (len(cube['latitude']), float(cube['latitude'][0]), float(cube['latitude'][-1]),
+            len(cube['longitude']), float(cube['longitude'][0]), float(cube['longitude'][-1]),
+            tuple(cube['time']), name)
+    cache = source.get('reductions', {})
+    known = {r: cache[(view, r)] for r in reductions if (view, r) in cache}
+    missing = [r for r in reductions if r not in known]
+    if missing:
+        if len(cache) + len(missing) > REDUCTION_CACHE_MAX:
+            clear_results(source, 'reductions')
+        for r, value in array_reductions(values, missing).items():
+            known[r] = attach_result(source, 'reductions', (view, r), value)
+        if 'key' in source:
+            cube_cache.resize(source['key'])
+    return {r: known[r] for r in reductions}
+
+
+def select_fields(source, cube, fields, derived=None):
+    """
+    JSON data with only the selected ?fields= parts of a cube
+
+    Grids are only converted to lists when 'values' is selected; reductions
+    come from cube_reductions. Derived current direction has no reductions
+    (as in the full response) and is left out unless values are selected.
+    """
+    reductions = [f for f in fields if f in REDUCTIONS]
+    data = {}
+    with conversion_seconds.time(step='to_json'):
+        for var, data_array in cube['variables'].items():
+            entry = {'shape': list(data_array.shape)}
+            if 'values' in fields:
+                entry['values'] = np.nan_to_num(data_array, nan=0.0).tolist()
+            entry.update(cube_reductions(source, cube, var, data_array, reductions))
+            data[var] = entry
+
+        for name, data_array in (derived or {}).items():
+            entry = {'units': 'm/s' if name == 'speed' else 'degrees'}
+            if 'values' in fields:
+                entry['values'] = np.nan_to_num(data_array, nan=0.0).tolist()
+            elif name == 'direction':
+                continue
+            if name == 'speed':
+                entry.update(cube_reductions(source, cube, name, data_array, reductions))
+            data[name] = entry
+
+        if 'coordinates' in fields:
+            data['coordinates'] = {
+                'latitude': cube['latitude'].tolist(),
+                'longitude': cube['longitude'].tolist(),
+                'time': list(cube['time'])
+            }
+    return data
+
+
+def level_metadata(level, cube):
+    """LOD fields added to endpoint metadata"""
+    return {
+        'level': level,
+        'grid_step': axis_spec(cube['latitude'])[1],
+        'grid_shape': [len(cube['latitude']), len(cube['longitude'])]
+    }
+
+
+def render_layer_tile(layer, date_str, z, x, y, cube=None):
+    """
+    Render (or fetch from the tile cache) one PNG tile of a layer
+
+    Tiles outside SRI_LANKA_BOUNDS are blank and never touch the data cache.
+    A tile rendered from a stale cube or an earlier day (date fallback) is
+    cached for STALE_TILE_TTL instead of CACHE_DURATION.
+
+    Returns:
+        (png bytes, seconds the tile may be cached by clients)
+    """
+    bounds = tile_bounds(z, x, y)
+    if (bounds['min_lat'] > SRI_LANKA_BOUNDS['max_lat'] or bounds['max_lat'] < SRI_LANKA_BOUNDS['min_lat'] or
+            bounds['min_lon'] > SRI_LANKA_BOUNDS['max_lon'] or bounds['max_lon'] < SRI_LANKA_BOUNDS['min_lon']):
+        return BLANK_TILE, CACHE_DURATION
+
+    key = (layer, date_str, z, x, y)
+    if cube is None:
+        cached = tile_cache.get(key)
+        if cached is not None:
+            return cached
+
+    spec = TILE_LAYERS[layer]
+    ttl = CACHE_DURATION
+    if cube is None:
+        dataset_type = spec['dataset']
+        served_date, cube = fetch_latest_cube(DATASETS[dataset_type], DATASET_VARIABLES[dataset_type],
+                                              date_str, date_str, 0)
+        if freshness_metadata(cube, date_str, served_date)['stale']:
+            ttl = STALE_TILE_TTL
+
+    values = cube['variables'][spec['variable']]
+    grid = values.reshape(-1, values.shape[-2], values.shape[-1])[0]  # first time step, surface
+    image = render_tile(grid, cube['latitude'], cube['longitude'], z, x, y,
+                        spec['vmin'], spec['vmax'], tile_luts[layer])
+    png = encode_png(image)
+    tile_cache.put(key, png, ttl)
+    return png, ttl
+
+
+def prerender_tiles(dataset_id, date_str, cube):
+    """Render the common zoom levels of every tile layer backed by this dataset"""
+    count = 0
+    for layer, spec in TILE_LAYERS.items():
+        if DATASETS[spec['dataset']] != dataset_id or spec['variable'] not in cube['variables']:
+            continue
+        for z in TILE_PRERENDER_ZOOMS:
+            for x, y in tiles_covering(SRI_LANKA_BOUNDS, z):
+                render_layer_tile(layer, date_str, z, x, y, cube=cube)
+                count += 1
+    return count
+
+
+def keep_cube_result(cube, kind, key, result):
+    """Keep a result with its cube (see ocean_cache.attach_result) and re-account the cached cube's size"""
+    result = attach_result(cube, kind, key, result)
+    if 'key' in cube:
+        cube_cache.resize(cube['key'])
+    return result
+
+
+def cube_fronts(cube, threshold=FRONT_THRESHOLD, min_cells=FRONT_MIN_CELLS):
+    """
+    Thermal front GeoJSON of a temperature cube
+
+    The default detection is computed once and kept with the cached cube;
+    custom thresholds are computed per request, so client-chosen parameters
+    cannot grow the cached cube.
+    """
+    key = (threshold, min_cells)
+    fronts = cube.get('fronts', {}).get(key)
+    if fronts is None:
+        values = cube['variables']['thetao']
+        sst = values.reshape((-1,) + values.shape[-2:])[0]
+        fronts = detect_fronts(sst, cube['latitude'], cube['longitude'], threshold, min_cells)
+        if key == (FRONT_THRESHOLD, FRONT_MIN_CELLS):
+            fronts = keep_cube_result(cube, 'fronts', key, fronts)
+    return fronts
+
+
+def cube_vectors(cube, kind, level=0, method='rk4'):
+    """
+    Current arrows or streamlines GeoJSON of one LOD level of a currents cube,
+    computed once and kept with the cached cube
+
+    Args:
+        kind: 'arrows' or 'streamlines'
+        level: LOD level (arrows are one per cell of the pooled grid)
+        method: Streamline integration, 'rk2' or 'rk4'
+    """
+    key = (kind, level) if kind == 'arrows' else (kind, level, method)
+    vectors = cube.get('vectors', {}).get(key)
+    if vectors is None:
+        coarse = cube_pyramid(cube)[level]
+        u, v = (coarse['variables'][var] for var in ('uo', 'vo'))
+        u = u.reshape((-1,) + u.shape[-2:])[0]
+        v = v.reshape((-1,) + v.shape[-2:])[0]
+        if kind == 'arrows':
+            vectors = arrow_features(u, v, coarse['latitude'], coarse['longitude'], ARROW_REFERENCE_SPEED)
+        else:
+            vectors = trace_streamlines(u, v, coarse['latitude'], coarse['longitude'],
+                                        STREAMLINE_SEED_SPACING, STREAMLINE_STEP,
+                                        STREAMLINE_MAX_STEPS, method)
+        vectors = keep_cube_result(cube, 'vectors', key, vectors)
+    return vectors
+
+
+def warm_cube(**fetch_args):
+    """
+    Fetch (refresh) a cube, then build its LOD pyramid, common map tiles,
+    fronts and current arrows/streamlines up front
+    """
+    cube = fetch_ocean_cube(**fetch_args)
+    cube_pyramid(cube)
+    prerender_tiles(fetch_args['dataset_id'], fetch_args['start_date'], cube)
+    if 'thetao' in cube['variables']:
+        cube_fronts(cube)
+    if 'uo' in cube['variables'] and 'vo' in cube['variables']:
+        for level in range(len(LOD_FACTORS)):
+            cube_vectors(cube, 'arrows', level)
+            cube_vectors(cube, 'streamlines', level)
+    return cube
+
+
+def binary_ocean_response(cube, metadata, derived=None, encoding='float32'):
+    """
+    Encode a cube as the compact binary format (see ocean_encoding)
+
+    Float32 grids are sent as-is, with NaN marking land/missing cells, or
+    packed as int16 plus a validity bitmask when encoding is 'int16'.
+    """
+    arrays = dict(cube['variables'])
+    arrays.update(derived or {})
+    stats = {name: array_stats(values) for name, values in arrays.items()}
+    arrays, value_encoding = pack_values(arrays, encoding)
+
+    header = {
+        'success': True,
+        'stats': stats,
+        'encoding': value_encoding,
+        'coordinates': {'time': list(cube['time'])},
+        'metadata': metadata
+    }
+
+    arrays['latitude'] = cube['latitude']
+    arrays['longitude'] = cube['longitude']
+
+    with serialization_seconds.time(format='binary'):
+        payload = encode_arrays(arrays, header)
+    return Response(payload, mimetype=BINARY_MIMETYPE)
+
+
+def binary_animation_response(cube, metadata, encoding='float32'):
+    """
+    Encode every time step of a cube as animation frames in one binary payload
+
+    'frames' is a single (time, variable, lat, lon) array, so frame k is one
+    contiguous block of header['frames']['frame_nbytes'] bytes; coordinates,
+    stats and int16 scales are sent once for all frames. With int16, each
+    variable has one scale across all frames (no colour flicker between
+    frames) and a '<variable>.mask' bitmask over its (time, lat, lon) cells.
+    """
+    n_times = len(cube['time'])
+    names = list(cube['variables'])
+    grids = {var: values.reshape((n_times, -1) + values.shape[-2:])[:, 0]
+             for var, values in cube['variables'].items()}
+    packed, value_encoding = pack_values(grids, encoding)
+    frames = np.stack([np.asarray(packed[var], dtype=np.int16 if encoding == 'int16' else np.float32)
+                       for var in names], axis=1)
+
+    header = {
+        'success': True,
+        'stats': {var: array_stats(values) for var, values in grids.items()},
+        'encoding': value_encoding,
+        'frames': {
+            'count': n_times,
+            'time': list(cube['time']),
+            'variables': names,
+            'frame_nbytes': frames[0].nbytes if n_times else 0
+        },
+        'metadata': metadata
+    }
+
+    arrays = {'latitude': cube['latitude'], 'longitude': cube['longitude'], 'frames': frames}
+    arrays.update({name: values for name, values in packed.items() if name.endswith('.mask')})
+
+    with serialization_seconds.time(format='binary'):
+        payload = encode_arrays(arrays, header)
+    return Response(payload, mimetype=BINARY_MIMETYPE)
+
+
+def prefetch_enabled():
+    """Whether this process warms today's products (OCEAN_PREFETCH, on unless set to 0)"""
+    return os.environ.get('OCEAN_PREFETCH', '1') != '0'
 
-    except Exception as e:
-        logger.error(f"Error fetching data from Copernicus: {str(e)}")
-        raise
+
+# Keeps today's live products warm (one leader per cache directory, see ocean_prefetch)
+prefetcher = PrefetchScheduler(
+    fetch=warm_cube,
+    jobs={
+        name: {
+            'dataset_id': DATASETS[name],
+            'variables': DATASET_VARIABLES[name],
+            'depth': 0
+        }
+        for name in DATASETS
+    },
+    ttl=CACHE_DURATION,
+    lock_path=os.path.join(cube_cache.cache_dir, 'prefetch.lock')
+)
+
+if prefetch_enabled():
+    prefetcher.start()
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+def _measured_stream(chunks, started, route, method, status):
+    """Pass a streamed body through, recording its duration and size when it ends"""
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        request_seconds.observe(time.perf_counter() - started, route=route, method=method, status=status)
+        response_bytes.observe(size, route=route)
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Latency and size per route template (so tile coordinates do not explode the series)"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    if response.is_streamed:
+        response.response = _measured_stream(response.response, started, route,
+                                             request.method, response.status_code)
+        return response
+
+    request_seconds.observe(time.perf_counter() - started, route=route,
+                            method=request.method, status=response.status_code)
+    response_bytes.observe(response.calculate_content_length() or 0, route=route)
+    return response
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Prometheus metrics for this worker process
+
+    Returns:
+        Text exposition format with per-route latency and response size
+        histograms, upstream open_dataset, array conversion and
+        serialization timings, cache hit ratio and in-flight fetches
+    """
+    return Response(metrics.render(), content_type=MetricsRegistry.CONTENT_TYPE)
 
 
 @app.route('/api/health', methods=['GET'])
@@ -138,7 +1164,34 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'NARA Copernicus Marine API',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': datetime.now().isoformat(),
+        'data_source': data_source.name,
+        'upstream': upstream_fetches.snapshot(),
+        'prefetch': prefetcher.status(),
+        'tiles': tile_cache.snapshot()
+    })
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """
+    Cache statistics for capacity planning
+
+    Returns:
+        JSON with cube cache hits/misses/evictions and resident bytes,
+        upstream request coalescing counters, remembered upstream failures,
+        background refreshes of stale cubes, tile cache counters and the
+        archive chunk cache
+    """
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'cubes': cube_cache.snapshot(),
+        'upstream': upstream_fetches.snapshot(),
+        'failures': failed_fetches.snapshot(),
+        'revalidations': revalidator.snapshot(),
+        'tiles': tile_cache.snapshot(),
+        'archive': ocean_archive.snapshot()
     })
 
 
@@ -150,343 +1203,1770 @@ def get_live_temperature():
     Query Parameters:
         date: Optional date (YYYY-MM-DD), defaults to today
         depth: Optional depth in meters, defaults to 0 (surface)
+        level: Optional LOD level 0-3 (native, 1/2, 1/4, 1/8 resolution)
+        max_cells: Optional cell budget; picks the finest level with at most this many lat x lon cells
+        bbox: Optional sub-region minLon,minLat,maxLon,maxLat (sliced from the cached cube)
+        format: Optional 'bin' for the compact binary response (see ocean_encoding)
+        encoding: Optional 'int16' to pack binary grids as int16 + validity bitmask
+        fields: Optional parts/reductions to return instead of the full grid, e.g. 'stats'
+                (min,max,mean), 'count', 'std', 'values', 'coordinates' (always JSON)
+
+    Returns:
+        JSON with temperature data, coordinates, and metadata
+    """
+    try:
+        # Parse query parameters
+        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        depth = float(request.args.get('depth', 0))
+
+        try:
+            level, max_cells = parse_lod_args(request.args)
+            bbox = parse_bbox(request.args)
+            encoding = parse_encoding(request.args)
+            fields = parse_fields(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid query parameter: {str(e)}'
+            }), 400
+
+        fetch_args = dict(
+            dataset_id=DATASETS['temperature'],
+            variables=('thetao',),  # Sea water potential temperature
+            start_date=date_str,
+            end_date=date_str,
+            depth=depth
+        )
+        metadata = {
+            'dataset': 'Sea Surface Temperature',
+            'source': 'Copernicus Marine Service',
+            'date': date_str,
+            'depth': depth,
+            'units': '°C',
+            'bounds': SRI_LANKA_BOUNDS,
+            'cached': True
+        }
+
+        # Fetch data (cached for 1 hour, stale or earlier data while upstream is unavailable)
+        served_date, source = fetch_latest_cube(**fetch_args)
+        metadata.update(freshness_metadata(source, date_str, served_date))
+        level, cube = select_level(source, level, max_cells, bbox)
+        metadata.update(level_metadata(level, cube))
+        if bbox:
+            metadata['bounds'] = bbox
+
+        if fields:
+            return jsonify({
+                'success': True,
+                'data': select_fields(source, cube, fields),
+                'metadata': metadata
+            })
+
+        if wants_binary(request):
+            return binary_ocean_response(cube, metadata, encoding=encoding)
+
+        data = cube_to_dict(cube)
+
+        return jsonify({
+            'success': True,
+            'data': data,
+            'metadata': metadata
+        })
+
+    except Exception as e:
+        logger.error(f"Error in get_live_temperature: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/ocean/temperature/anomaly', methods=['GET'])
+def get_temperature_anomaly():
+    """
+    Get the sea surface temperature anomaly against the day-of-year climatology
+
+    The climatology is memory-mapped, so a request costs one subtraction on
+    the day's (cached or archived) cube.
+
+    Query Parameters:
+        date: Optional date (YYYY-MM-DD), defaults to today
+        standardized: Optional 'true' to divide by the climatological standard deviation
+        bbox: Optional sub-region minLon,minLat,maxLon,maxLat
+        format: Optional 'bin' for the compact binary response (see ocean_encoding)
+        encoding: Optional 'int16' to pack binary grids as int16 + validity bitmask
+
+    Returns:
+        JSON with the 'anomaly' grid (°C, or standard deviations; null where
+        there is no data or climatology), coordinates and the number of years
+        behind the climatology
+    """
+    try:
+        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        standardized = request.args.get('standardized', '').lower() in ('1', 'true', 'yes')
+
+        try:
+            date = datetime.strptime(date_str, '%Y-%m-%d')
+            bbox = parse_bbox(request.args)
+            encoding = parse_encoding(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid query parameter: {str(e)}'
+            }), 400
+
+        climatology = sst_climatology.day(date)
+        if climatology is None or not np.any(climatology[2] > 0):
+            return jsonify({
+                'success': False,
+                'error': f'No SST climatology for {date:%d %B} yet. Build it with ingest_ocean_archive.py'
+            }), 404
+        clim_mean, clim_std, count = climatology
+
+        _, cube, error = next(iter_day_cubes(DATASETS['temperature'], ('thetao',), [date_str],
+                                             archive_name='temperature'))
+        if error is not None:
+            raise error
+
+        latitude, longitude = sst_climatology.grid()
+        if not (np.array_equal(cube['latitude'], latitude) and np.array_equal(cube['longitude'], longitude)):
+            raise ValueError('Temperature grid differs from the climatology grid')
+
+        if bbox:
+            lat_slice, lon_slice = bbox_slices(latitude, longitude, bbox)
+            cube = slice_cube(cube, bbox)
+            clim_mean, clim_std, count = (a[lat_slice, lon_slice] for a in (clim_mean, clim_std, count))
+
+        anomaly = cube['variables']['thetao'] - clim_mean
+        if standardized:
+            # No z-score where the spread is unknown (one sample) or (near) zero
+            usable = np.isfinite(clim_std) & (clim_std >= CLIMATOLOGY_MIN_STD)
+            anomaly = np.where(usable, anomaly / np.where(usable, clim_std, 1.0), np.nan).astype(np.float32)
+
+        anomaly_cube = {
+            'variables': {'anomaly': anomaly},
+            'latitude': cube['latitude'],
+            'longitude': cube['longitude'],
+            'time': cube['time']
+        }
+        metadata = {
+            'dataset': 'Sea Surface Temperature Anomaly',
+            'source': 'Copernicus Marine Service',
+            'date': date_str,
+            'day_of_year': calendar_slot(date) + 1,
+            'units': 'standard deviations' if standardized else '°C',
+            'climatology_years': {
+                'min': int(count[count > 0].min()) if np.any(count > 0) else 0,
+                'max': int(count.max())
+            },
+            'bounds': bbox or SRI_LANKA_BOUNDS
+        }
+
+        if wants_binary(request):
+            return binary_ocean_response(anomaly_cube, metadata, encoding=encoding)
+
+        return jsonify({
+            'success': True,
+            'data': cube_to_dict(anomaly_cube, nullable=True),
+            'metadata': metadata
+        })
+
+    except Exception as e:
+        logger.error(f"Error in get_temperature_anomaly: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/ocean/fronts', methods=['GET'])
+def get_thermal_fronts():
+    """
+    Get thermal fronts (potential fishing zone candidates) as GeoJSON
+
+    Fronts are detected on the cached daily SST grid (Sobel gradient,
+    threshold, connected regions). The default detection is computed once per
+    date and reused for every visitor.
+
+    Query Parameters:
+        date: Optional date (YYYY-MM-DD), defaults to today
+        threshold: Optional minimum SST gradient in °C/km (default 0.03)
+        min_cells: Optional smallest region in grid cells (default 3)
+
+    Returns:
+        GeoJSON FeatureCollection with one MultiPolygon per front region
+        (cells, area_km2, mean/max gradient, mean SST, centroid), strongest
+        first, plus a 'metadata' member
+    """
+    try:
+        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+
+        try:
+            threshold = float(request.args.get('threshold', FRONT_THRESHOLD))
+            min_cells = int(request.args.get('min_cells', FRONT_MIN_CELLS))
+            if not math.isfinite(threshold) or threshold <= 0 or min_cells < 1:
+                raise ValueError('threshold must be a positive number and min_cells at least 1')
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid query parameter: {str(e)}'
+            }), 400
+
+        served_date, cube = fetch_latest_cube(
+            dataset_id=DATASETS['temperature'],
+            variables=DATASET_VARIABLES['temperature'],
+            start_date=date_str,
+            end_date=date_str
+        )
+        fronts = cube_fronts(cube, threshold, min_cells)
+
+        body = dict(fronts)
+        body['metadata'] = {
+            'dataset': 'Thermal Fronts',
+            'source': 'Copernicus Marine Service',
+            'date': date_str,
+            'time': cube['time'][0],
+            'threshold': threshold,
+            'threshold_units': '°C/km',
+            'min_cells': min_cells,
+            'regions': len(fronts['features']),
+            'bounds': SRI_LANKA_BOUNDS
+        }
+        body['metadata'].update(freshness_metadata(cube, date_str, served_date))
+        with serialization_seconds.time(format='json'):
+            payload = json.dumps(body)
+        return Response(payload, mimetype=GEOJSON_MIMETYPE)
+
+    except Exception as e:
+        logger.error(f"Error in get_thermal_fronts: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/ocean/currents/live', methods=['GET'])
+def get_live_currents():
+    """
+    Get live ocean current data (velocity components) for Sri Lanka waters
+
+    Query Parameters:
+        date: Optional date (YYYY-MM-DD), defaults to today
+        depth: Optional depth in meters, defaults to 0 (surface)
+        level: Optional LOD level 0-3 (native, 1/2, 1/4, 1/8 resolution)
+        max_cells: Optional cell budget; picks the finest level with at most this many lat x lon cells
+        bbox: Optional sub-region minLon,minLat,maxLon,maxLat (sliced from the cached cube)
+        format: Optional 'bin' for the compact binary response (see ocean_encoding)
+        encoding: Optional 'int16' to pack binary grids as int16 + validity bitmask
+        fields: Optional parts/reductions to return instead of the full grid, e.g. 'stats'
+                (min,max,mean), 'count', 'std', 'values', 'coordinates' (always JSON)
+
+    Returns:
+        JSON with current velocity (U, V components), coordinates, and metadata
+    """
+    try:
+        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        depth = float(request.args.get('depth', 0))
+
+        try:
+            level, max_cells = parse_lod_args(request.args)
+            bbox = parse_bbox(request.args)
+            encoding = parse_encoding(request.args)
+            fields = parse_fields(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid query parameter: {str(e)}'
+            }), 400
+
+        # U (eastward) and V (northward) velocity components
+        fetch_args = dict(
+            dataset_id=DATASETS['currents'],
+            variables=('uo', 'vo'),  # Eastward and northward velocities
+            start_date=date_str,
+            end_date=date_str,
+            depth=depth
+        )
+        metadata = {
+            'dataset': 'Ocean Currents',
+            'source': 'Copernicus Marine Service',
+            'date': date_str,
+            'depth': depth,
+            'units': 'm/s',
+            'bounds': SRI_LANKA_BOUNDS,
+            'cached': True
+        }
+
+        served_date, source = fetch_latest_cube(**fetch_args)
+        metadata.update(freshness_metadata(source, date_str, served_date))
+        level, cube = select_level(source, level, max_cells, bbox)
+        metadata.update(level_metadata(level, cube))
+        if bbox:
+            metadata['bounds'] = bbox
+
+        if fields:
+            return jsonify({
+                'success': True,
+                'data': select_fields(source, cube, fields, cube_derived(cube)),
+                'metadata': metadata
+            })
+
+        # Speed and direction were derived from the float32 components at fetch time
+        if wants_binary(request):
+            return binary_ocean_response(cube, metadata, cube_derived(cube), encoding)
+
+        data = cube_to_dict(cube)
+        data.update(derived_to_dict(cube_derived(cube)))
+
+        return jsonify({
+            'success': True,
+            'data': data,
+            'metadata': metadata
+        })
+
+    except Exception as e:
+        logger.error(f"Error in get_live_currents: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def parse_vector_level(args):
+    """
+    LOD level for the current vector endpoints, from ?level= or the map ?zoom=
+
+    Returns:
+        Level 0 (native grid) at VECTOR_NATIVE_ZOOM and closer, one level
+        coarser per zoom level out; raises ValueError when invalid
+    """
+    level, _ = parse_lod_args(args)
+    zoom = args.get('zoom')
+    if level is not None or zoom is None:
+        return level or 0
+
+    zoom = int(zoom)
+    if not 0 <= zoom <= TILE_MAX_ZOOM:
+        raise ValueError(f'zoom must be between 0 and {TILE_MAX_ZOOM}')
+    return int(np.clip(VECTOR_NATIVE_ZOOM - zoom, 0, len(LOD_FACTORS) - 1))
+
+
+def current_vectors_response(kind, method='rk4'):
+    """GeoJSON response for /api/ocean/currents/arrows and /streamlines"""
+    date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+    depth = float(request.args.get('depth', 0))
+
+    try:
+        level = parse_vector_level(request.args)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid query parameter: {str(e)}'
+        }), 400
+
+    served_date, cube = fetch_latest_cube(
+        dataset_id=DATASETS['currents'],
+        variables=DATASET_VARIABLES['currents'],
+        start_date=date_str,
+        end_date=date_str,
+        depth=depth
+    )
+    vectors = cube_vectors(cube, kind, level, method)
+
+    body = dict(vectors)
+    body['metadata'] = {
+        'dataset': 'Ocean Currents',
+        'source': 'Copernicus Marine Service',
+        'date': date_str,
+        'time': cube['time'][0],
+        'depth': depth,
+        'units': 'm/s',
+        'features': len(vectors['features']),
+        'bounds': SRI_LANKA_BOUNDS
+    }
+    if kind == 'streamlines':
+        body['metadata']['method'] = method
+    body['metadata'].update(level_metadata(level, cube_pyramid(cube)[level]))
+    body['metadata'].update(freshness_metadata(cube, date_str, served_date))
+
+    with serialization_seconds.time(format='json'):
+        payload = json.dumps(body)
+    return Response(payload, mimetype=GEOJSON_MIMETYPE)
+
+
+@app.route('/api/ocean/currents/arrows', methods=['GET'])
+def get_current_arrows():
+    """
+    Get ready-to-draw current arrows as GeoJSON
+
+    One arrow per cell of the LOD level matching the map zoom (pooled
+    components, so zoomed-out maps get fewer, averaged arrows). Computed once
+    per date and level from the cached currents cube.
+
+    Query Parameters:
+        date: Optional date (YYYY-MM-DD), defaults to today
+        depth: Optional depth in meters, defaults to 0 (surface)
+        zoom: Optional map zoom (0-12) choosing the level (native grid from zoom 9)
+        level: Optional LOD level 0-3, instead of zoom
+
+    Returns:
+        GeoJSON FeatureCollection of MultiLineString arrows (shaft and head)
+        with speed (m/s) and direction (degrees from north) properties, plus
+        a 'metadata' member
+    """
+    try:
+        return current_vectors_response('arrows')
+
+    except Exception as e:
+        logger.error(f"Error in get_current_arrows: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/ocean/currents/streamlines', methods=['GET'])
+def get_current_streamlines():
+    """
+    Get current streamlines as GeoJSON
+
+    Lines are traced server-side through the cached current field (all seeds
+    integrated together with RK2 or RK4 steps) at the LOD level matching the
+    map zoom, once per date, level and method.
+
+    Query Parameters:
+        date: Optional date (YYYY-MM-DD), defaults to today
+        depth: Optional depth in meters, defaults to 0 (surface)
+        zoom: Optional map zoom (0-12) choosing the level (native grid from zoom 9)
+        level: Optional LOD level 0-3, instead of zoom
+        method: Optional 'rk4' (default) or 'rk2'
+
+    Returns:
+        GeoJSON FeatureCollection of LineStrings with mean_speed, max_speed
+        (m/s) and length_km properties, longest first, plus a 'metadata' member
+    """
+    try:
+        method = request.args.get('method', 'rk4')
+        if method not in STREAMLINE_METHODS:
+            return jsonify({
+                'success': False,
+                'error': f"Invalid method. Must be one of: {', '.join(STREAMLINE_METHODS)}"
+            }), 400
+
+        return current_vectors_response('streamlines', method)
+
+    except Exception as e:
+        logger.error(f"Error in get_current_streamlines: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/ocean/waves/live', methods=['GET'])
+def get_live_waves():
+    """
+    Get live wave conditions for Sri Lanka waters
+
+    Query Parameters:
+        date: Optional date (YYYY-MM-DD), defaults to today
+        level: Optional LOD level 0-3 (native, 1/2, 1/4, 1/8 resolution)
+        max_cells: Optional cell budget; picks the finest level with at most this many lat x lon cells
+        bbox: Optional sub-region minLon,minLat,maxLon,maxLat (sliced from the cached cube)
+        time: Optional timestamp ("2025-10-24T06:00" or "06:00"); returns the nearest 3-hourly step
+        step: Optional time step index or start:stop[:stride] slice (pages through the day's steps)
+        animation: Optional 'true' for all selected steps as binary frames in one buffer
+        format: Optional 'bin' for the compact binary response (see ocean_encoding)
+        encoding: Optional 'int16' to pack binary grids as int16 + validity bitmask
+        fields: Optional parts/reductions to return instead of the full grid, e.g. 'stats'
+                (min,max,mean), 'count', 'std', 'values', 'coordinates' (always JSON)
+
+    Returns:
+        JSON with wave height, direction, period data
+    """
+    try:
+        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        animation = request.args.get('animation', '').lower() in ('1', 'true', 'yes')
+
+        try:
+            level, max_cells = parse_lod_args(request.args)
+            bbox = parse_bbox(request.args)
+            encoding = parse_encoding(request.args)
+            fields = parse_fields(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid query parameter: {str(e)}'
+            }), 400
+
+        fetch_args = dict(
+            dataset_id=DATASETS['waves'],
+            variables=('VHM0', 'VMDR', 'VTPK'),  # Significant wave height, direction, peak period
+            start_date=date_str,
+            end_date=date_str,
+            depth=0
+        )
+        metadata = {
+            'dataset': 'Wave Conditions',
+            'source': 'Copernicus Marine Service',
+            'date': date_str,
+            'variables': {
+                'VHM0': 'Significant Wave Height (m)',
+                'VMDR': 'Wave Direction (degrees)',
+                'VTPK': 'Wave Peak Period (s)'
+            },
+            'bounds': SRI_LANKA_BOUNDS,
+            'cached': True
+        }
+
+        # Fetch wave data
+        served_date, source = fetch_latest_cube(**fetch_args)
+        metadata.update(freshness_metadata(source, date_str, served_date))
+
+        try:
+            selected = parse_time_args(request.args, source['time'])
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid query parameter: {str(e)}'
+            }), 400
+
+        level, cube = select_level(source, level, max_cells, bbox)
+        metadata.update(level_metadata(level, cube))
+        if bbox:
+            metadata['bounds'] = bbox
+
+        # 3-hourly steps: report the selection so clients can page through the day
+        metadata['time_steps'] = len(cube['time'])
+        metadata['steps'] = list(range(len(cube['time'])))[selected]
+        cube = slice_times(cube, selected)
+
+        if fields:
+            return jsonify({
+                'success': True,
+                'data': select_fields(source, cube, fields),
+                'metadata': metadata
+            })
+
+        if animation:
+            return binary_animation_response(cube, metadata, encoding)
+
+        if wants_binary(request):
+            return binary_ocean_response(cube, metadata, encoding=encoding)
+
+        data = cube_to_dict(cube)
+
+        return jsonify({
+            'success': True,
+            'data': data,
+            'metadata': metadata
+        })
+
+    except Exception as e:
+        logger.error(f"Error in get_live_waves: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/ocean/salinity/live', methods=['GET'])
+def get_live_salinity():
+    """
+    Get live sea water salinity for Sri Lanka waters
+
+    Query Parameters:
+        date: Optional date (YYYY-MM-DD), defaults to today
+        depth: Optional depth in meters, defaults to 0 (surface)
+        level: Optional LOD level 0-3 (native, 1/2, 1/4, 1/8 resolution)
+        max_cells: Optional cell budget; picks the finest level with at most this many lat x lon cells
+        bbox: Optional sub-region minLon,minLat,maxLon,maxLat (sliced from the cached cube)
+        format: Optional 'bin' for the compact binary response (see ocean_encoding)
+        encoding: Optional 'int16' to pack binary grids as int16 + validity bitmask
+        fields: Optional parts/reductions to return instead of the full grid, e.g. 'stats'
+                (min,max,mean), 'count', 'std', 'values', 'coordinates' (always JSON)
+
+    Returns:
+        JSON with salinity data (PSU - Practical Salinity Units)
+    """
+    try:
+        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        depth = float(request.args.get('depth', 0))
+
+        try:
+            level, max_cells = parse_lod_args(request.args)
+            bbox = parse_bbox(request.args)
+            encoding = parse_encoding(request.args)
+            fields = parse_fields(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid query parameter: {str(e)}'
+            }), 400
+
+        fetch_args = dict(
+            dataset_id=DATASETS['salinity'],
+            variables=('so',),  # Sea water salinity
+            start_date=date_str,
+            end_date=date_str,
+            depth=depth
+        )
+        metadata = {
+            'dataset': 'Sea Water Salinity',
+            'source': 'Copernicus Marine Service',
+            'date': date_str,
+            'depth': depth,
+            'units': 'PSU',
+            'bounds': SRI_LANKA_BOUNDS,
+            'cached': True
+        }
+
+        served_date, source = fetch_latest_cube(**fetch_args)
+        metadata.update(freshness_metadata(source, date_str, served_date))
+        level, cube = select_level(source, level, max_cells, bbox)
+        metadata.update(level_metadata(level, cube))
+        if bbox:
+            metadata['bounds'] = bbox
+
+        if fields:
+            return jsonify({
+                'success': True,
+                'data': select_fields(source, cube, fields),
+                'metadata': metadata
+            })
+
+        if wants_binary(request):
+            return binary_ocean_response(cube, metadata, encoding=encoding)
+
+        data = cube_to_dict(cube)
+
+        return jsonify({
+            'success': True,
+            'data': data,
+            'metadata': metadata
+        })
+
+    except Exception as e:
+        logger.error(f"Error in get_live_salinity: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/ocean/historical', methods=['GET'])
+def get_historical_data():
+    """
+    Get historical ocean data for a specified time range
+
+    Query Parameters:
+        dataset: temperature, currents, waves, or salinity
+        start_date: Start date (YYYY-MM-DD)
+        end_date: End date (YYYY-MM-DD)
+        depth: Optional depth in meters (default 0; surface days come from the local archive)
+        lat: Optional specific latitude
+        lon: Optional specific longitude
+        bbox: Optional sub-region minLon,minLat,maxLon,maxLat (sliced from the cached cube)
+        format: Optional 'ndjson' to stream one JSON line per day, or 'bin' to
+                stream one binary frame per day (see ocean_encoding)
+        encoding: Optional 'int16' to pack binary grids as int16 + validity bitmask
+
+    Returns:
+        JSON with historical time series data
+    """
+    try:
+        dataset_type = request.args.get('dataset', 'temperature')
+        start_date = request.args.get('start_date', (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d'))
+        end_date = request.args.get('end_date', datetime.now().strftime('%Y-%m-%d'))
+        depth = float(request.args.get('depth', 0))
+
+        # Get dataset configuration
+        if dataset_type not in DATASETS:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid dataset type. Must be one of: {", ".join(DATASETS.keys())}'
+            }), 400
+
+        try:
+            dates = date_range(start_date, end_date)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid date range: {str(e)}'
+            }), 400
+
+        if len(dates) > HISTORICAL_MAX_DAYS:
+            return jsonify({
+                'success': False,
+                'error': f'Date range too long. Maximum is {HISTORICAL_MAX_DAYS} days'
+            }), 400
+
+        try:
+            bbox = parse_bbox(request.args)
+            encoding = parse_encoding(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid query parameter: {str(e)}'
+            }), 400
+
+        variables = DATASET_VARIABLES[dataset_type]
+        metadata = {
+            'dataset': dataset_type.title(),
+            'source': 'Copernicus Marine Service',
+            'start_date': start_date,
+            'end_date': end_date,
+            'depth': depth,
+            'bounds': bbox or SRI_LANKA_BOUNDS,
+            'archived_days': sum(ocean_archive.has_days(dataset_type, dates)) if depth == 0 else 0
+        }
+        # Cached days past their TTL are served while they refresh; flag them per day
+        days = ((date_str, cube, error, cube is not None and cube_cache.is_stale(cube))
+                for date_str, cube, error in iter_day_cubes(DATASETS[dataset_type], variables, dates, depth,
+                                                            archive_name=dataset_type))
+        if bbox:
+            days = ((date_str, slice_cube(cube, bbox) if cube is not None else None, error, stale)
+                    for date_str, cube, error, stale in days)
+
+        if request.args.get('format', '').lower() == 'ndjson' or \
+                request.accept_mimetypes.best == NDJSON_MIMETYPE:
+            return Response(stream_historical_ndjson(days, metadata), mimetype=NDJSON_MIMETYPE)
+
+        if wants_binary(request):
+            return Response(stream_historical_binary(days, metadata, encoding), mimetype=BINARY_MIMETYPE)
+
+        cubes = []
+        stale_days = []
+        for date_str, cube, error, stale in days:
+            if error is not None:
+                raise error
+            cubes.append(cube)
+            if stale:
+                stale_days.append(date_str)
+
+        data = cube_to_dict(concat_cubes(cubes))
+        metadata['stale'] = bool(stale_days)
+        metadata['stale_days'] = stale_days
+
+        return jsonify({
+            'success': True,
+            'data': data,
+            'metadata': metadata
+        })
+
+    except Exception as e:
+        logger.error(f"Error in get_historical_data: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def layer_to_dict(dataset_type, cube):
+    """JSON structure for one layer of a bundle (coordinates are shared separately)"""
+    data = cube_to_dict(cube, include_coordinates=False)
+    if dataset_type == 'currents':
+        data.update(derived_to_dict(cube_derived(cube)))
+
+    data['time'] = list(cube['time'])
+    return data
+
+
+def binary_bundle_response(cubes, errors, metadata, encoding='float32'):
+    """
+    Encode several layers as one binary payload
+
+    Arrays are named '<layer>/<variable>'. Layers on the shared grid use the
+    top-level 'latitude'/'longitude' arrays; any other layer gets its own
+    '<layer>/latitude' and '<layer>/longitude'.
+    """
+    arrays = {}
+    layers = {}
+    encodings = {}
+    shared = None
+
+    for dataset_type, cube in cubes.items():
+        layer_arrays = dict(cube['variables'])
+        if dataset_type == 'currents':
+            layer_arrays.update(cube_derived(cube))
+
+        if shared is None:
+            shared = cube
+            arrays['latitude'] = cube['latitude']
+            arrays['longitude'] = cube['longitude']
+        on_shared_grid = (np.array_equal(cube['latitude'], shared['latitude']) and
+                          np.array_equal(cube['longitude'], shared['longitude']))
+        if not on_shared_grid:
+            arrays[f'{dataset_type}/latitude'] = cube['latitude']
+            arrays[f'{dataset_type}/longitude'] = cube['longitude']
+
+        packed, value_encoding = pack_values(
+            {f'{dataset_type}/{name}': values for name, values in layer_arrays.items()}, encoding
+        )
+        arrays.update(packed)
+        encodings.update(value_encoding)
+        layers[dataset_type] = {
+            'variables': list(layer_arrays),
+            'time': list(cube['time']),
+            'shared_grid': on_shared_grid,
+            'stats': {name: array_stats(values) for name, values in layer_arrays.items()}
+        }
+
+    header = {
+        'success': True,
+        'layers': layers,
+        'errors': errors,
+        'encoding': encodings,
+        'metadata': metadata
+    }
+    with serialization_seconds.time(format='binary'):
+        payload = encode_arrays(arrays, header)
+    return Response(payload, mimetype=BINARY_MIMETYPE)
+
+
+@app.route('/api/ocean/bundle', methods=['GET'])
+def get_ocean_bundle():
+    """
+    Get several ocean layers for one date in a single response
+
+    Missing layers are fetched concurrently and the latitude/longitude axes
+    are sent once for all layers on the shared 0.083° grid.
+
+    Query Parameters:
+        layers: Comma-separated list (default "temperature,currents,waves,salinity")
+        date: Optional date (YYYY-MM-DD), defaults to today
+        depth: Optional depth in meters, defaults to 0 (not used for waves)
+        level, max_cells, bbox: As for the live endpoints
+        format: Optional 'bin' for the compact binary response (see ocean_encoding)
+        encoding: Optional 'int16' to pack binary grids as int16 + validity bitmask
+
+    Returns:
+        JSON with one entry per layer, shared coordinates and per-layer errors
+    """
+    try:
+        layers = [name.strip() for name in
+                  request.args.get('layers', ','.join(DATASETS.keys())).split(',') if name.strip()]
+        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        depth = float(request.args.get('depth', 0))
+
+        invalid = [name for name in layers if name not in DATASETS]
+        if invalid or not layers:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid layers. Must be one or more of: {", ".join(DATASETS.keys())}'
+            }), 400
+
+        try:
+            level, max_cells = parse_lod_args(request.args)
+            bbox = parse_bbox(request.args)
+            encoding = parse_encoding(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid query parameter: {str(e)}'
+            }), 400
+
+        futures = {
+            name: fetch_pool.submit(
+                fetch_latest_cube, DATASETS[name], DATASET_VARIABLES[name],
+                date_str, date_str, 0 if name == 'waves' else depth
+            )
+            for name in dict.fromkeys(layers)
+        }
+
+        cubes = {}
+        errors = {}
+        freshness = {}
+        selected_level = None
+        for name, future in futures.items():
+            try:
+                served_date, cube = future.result()
+                freshness[name] = freshness_metadata(cube, date_str, served_date)
+                layer_level, cubes[name] = select_level(cube, level, max_cells, bbox)
+                if selected_level is None:
+                    selected_level = layer_level
+            except Exception as e:
+                logger.error(f"Error fetching bundle layer {name}: {str(e)}")
+                errors[name] = str(e)
+
+        if not cubes:
+            return jsonify({
+                'success': False,
+                'error': 'No layer could be fetched',
+                'errors': errors
+            }), 500
+
+        first = next(iter(cubes.values()))
+        metadata = {
+            'source': 'Copernicus Marine Service',
+            'date': date_str,
+            'depth': depth,
+            'layers': list(cubes),
+            'bounds': bbox or SRI_LANKA_BOUNDS,
+            'stale': any(info['stale'] for info in freshness.values()),
+            'freshness': freshness
+        }
+        metadata.update(level_metadata(selected_level, first))
+
+        if wants_binary(request):
+            return binary_bundle_response(cubes, errors, metadata, encoding)
+
+        data = {'layers': {}, 'coordinates': {
+            'latitude': first['latitude'].tolist(),
+            'longitude': first['longitude'].tolist()
+        }}
+        for name, cube in cubes.items():
+            data['layers'][name] = layer_to_dict(name, cube)
+            if not (np.array_equal(cube['latitude'], first['latitude']) and
+                    np.array_equal(cube['longitude'], first['longitude'])):
+                data['layers'][name]['coordinates'] = {
+                    'latitude': cube['latitude'].tolist(),
+                    'longitude': cube['longitude'].tolist()
+                }
+
+        return jsonify({
+            'success': True,
+            'data': data,
+            'errors': errors,
+            'metadata': metadata
+        })
+
+    except Exception as e:
+        logger.error(f"Error in get_ocean_bundle: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def ndjson_line(obj):
+    """One NDJSON record (ASCII, so its length is its size in bytes)"""
+    with serialization_seconds.time(format='ndjson'):
+        return json.dumps(obj) + '\n'
+
+
+def stream_historical_ndjson(days, metadata):
+    """
+    Stream a historical range as NDJSON
+
+    The first line always carries the metadata and the shared lat/lon axes
+    (null when no day could be fetched), then one line per day follows as
+    soon as that day is available, with 'stale' set for a cached day that
+    is past its TTL. Errors for leading days are held back
+    until the axes are known, so they never precede the metadata line.
+    """
+    metadata_sent = False
+    pending_errors = []
+
+    def metadata_line(cube):
+        coordinates = None
+        if cube is not None:
+            coordinates = {
+                'latitude': cube['latitude'].tolist(),
+                'longitude': cube['longitude'].tolist()
+            }
+        return ndjson_line({'type': 'metadata', 'metadata': metadata, 'coordinates': coordinates})
+
+    for date_str, cube, error, stale in days:
+        if error is not None:
+            logger.error(f"Error fetching historical day {date_str}: {str(error)}")
+            line = ndjson_line({'type': 'error', 'date': date_str, 'error': str(error)})
+            if metadata_sent:
+                yield line
+            else:
+                pending_errors.append(line)
+            continue
+
+        if not metadata_sent:
+            yield metadata_line(cube)
+            yield from pending_errors
+            pending_errors = []
+            metadata_sent = True
+
+        yield ndjson_line({
+            'type': 'day',
+            'date': date_str,
+            'stale': stale,
+            'time': list(cube['time']),
+            'data': cube_to_dict(cube, include_coordinates=False)
+        })
+
+    if not metadata_sent:
+        yield metadata_line(None)
+        yield from pending_errors
+
+
+def stream_historical_binary(days, metadata, encoding='float32'):
+    """Stream a historical range as consecutive binary frames, one per day"""
+    for date_str, cube, error, stale in days:
+        if error is not None:
+            logger.error(f"Error fetching historical day {date_str}: {str(error)}")
+            yield encode_arrays({}, {'success': False, 'date': date_str, 'error': str(error)})
+            continue
+
+        arrays, value_encoding = pack_values(cube['variables'], encoding)
+        header = {
+            'success': True,
+            'date': date_str,
+            'stale': stale,
+            'stats': {name: array_stats(values) for name, values in cube['variables'].items()},
+            'encoding': value_encoding,
+            'coordinates': {'time': list(cube['time'])},
+            'metadata': metadata
+        }
+        arrays['latitude'] = cube['latitude']
+        arrays['longitude'] = cube['longitude']
+        with serialization_seconds.time(format='binary'):
+            frame = encode_arrays(arrays, header)
+        yield frame
+
+
+@app.route('/api/ocean/tiles/<layer>/<int:z>/<int:x>/<int:y>.png', methods=['GET'])
+def get_ocean_tile(layer, z, x, y):
+    """
+    Get a colour-mapped XYZ (Web Mercator) PNG map tile
+
+    Path Parameters:
+        layer: sst, salinity, or waves (significant wave height)
+        z, x, y: Tile coordinates
+
+    Query Parameters:
+        date: Optional date (YYYY-MM-DD), defaults to today
+
+    Returns:
+        256x256 RGBA PNG; land, missing data and areas outside Sri Lanka waters are transparent
+    """
+    try:
+        if layer not in TILE_LAYERS:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid layer. Must be one of: {", ".join(TILE_LAYERS.keys())}'
+            }), 400
+
+        if not (0 <= z <= TILE_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            return jsonify({
+                'success': False,
+                'error': f'Invalid tile coordinates (zoom must be 0-{TILE_MAX_ZOOM})'
+            }), 400
+
+        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        png, max_age = render_layer_tile(layer, date_str, z, x, y)
+
+        # Client caching ends with the server copy (briefly for stale/fallback tiles)
+        response = Response(png, mimetype='image/png')
+        response.headers['Cache-Control'] = f'public, max-age={int(max_age)}'
+        return response
+
+    except Exception as e:
+        logger.error(f"Error in get_ocean_tile: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def parse_points(points_str):
+    """Parse 'lat,lon;lat,lon' into two float arrays"""
+    lats, lons = [], []
+    for pair in points_str.split(';'):
+        if not pair.strip():
+            continue
+        lat, lon = pair.split(',')
+        lats.append(float(lat))
+        lons.append(float(lon))
+    if not lats:
+        raise ValueError('No points given')
+    return np.array(lats), np.array(lons)
+
+
+def in_sri_lanka_bounds(lats, lons):
+    """Boolean mask of points inside SRI_LANKA_BOUNDS"""
+    return ((lats >= SRI_LANKA_BOUNDS['min_lat']) & (lats <= SRI_LANKA_BOUNDS['max_lat']) &
+            (lons >= SRI_LANKA_BOUNDS['min_lon']) & (lons <= SRI_LANKA_BOUNDS['max_lon']))
+
+
+def extract_point_series(cube, lats, lons, method='nearest'):
+    """
+    Sample every cube variable at many points in one vectorized pass
+
+    Direction variables are interpolated as unit vectors, so bilinear
+    sampling does not average 350° and 10° to 180°.
+
+    Returns:
+        Dict of variable -> array of shape (n_times, n_points), taken at the
+        first (requested) depth level of the cube
+    """
+    n_times = len(cube['time'])
+    series = {}
+    for var, values in cube['variables'].items():
+        if var in DIRECTION_VARIABLES and method == 'bilinear':
+            radians = np.radians(values)
+            sin, cos = (sample_points(f(radians), cube['latitude'], cube['longitude'], lats, lons, method)
+                        for f in (np.sin, np.cos))
+            sampled = np.degrees(np.arctan2(sin, cos)) % 360
+        else:
+            sampled = sample_points(values, cube['latitude'], cube['longitude'], lats, lons, method)
+        series[var] = sampled.reshape(n_times, -1, len(lats))[:, 0, :]
+
+    if 'uo' in series and 'vo' in series:
+        series['speed'], series['direction'] = current_speed_direction(series['uo'], series['vo'])
+
+    return series
+
+
+def _nullable(values):
+    """List of floats with NaN mapped to None (JSON null)"""
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+@app.route('/api/ocean/station', methods=['GET'])
+def get_station_data():
+    """
+    Get ocean data for a specific station/location
+
+    Values are read from the cached regional cube (the same one the live
+    endpoints use), so any number of stations costs one fetch per dataset.
+
+    Query Parameters:
+        lat: Latitude
+        lon: Longitude
+        points: Alternative to lat/lon, several stations as "lat,lon;lat,lon"
+        date: Optional date (YYYY-MM-DD)
+        depth: Optional depth in meters (default 0)
+        datasets: Comma-separated list (e.g., "temperature,currents,waves")
+        method: Optional 'nearest' (default) or 'bilinear'
+
+    Returns:
+        JSON with all requested data for the specific location(s)
+    """
+    try:
+        points_str = request.args.get('points')
+        if points_str:
+            lats, lons = parse_points(points_str)
+        else:
+            lats = np.array([float(request.args.get('lat'))])
+            lons = np.array([float(request.args.get('lon'))])
+        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        depth = float(request.args.get('depth', 0))
+        datasets = request.args.get('datasets', 'temperature,currents,waves').split(',')
+        method = request.args.get('method', 'nearest')
+
+        if method not in ('nearest', 'bilinear'):
+            return jsonify({
+                'success': False,
+                'error': "Invalid method. Must be 'nearest' or 'bilinear'"
+            }), 400
+
+        # Validate location is within Sri Lanka EEZ
+        if not np.all(in_sri_lanka_bounds(lats, lons)):
+            return jsonify({
+                'success': False,
+                'error': 'Location outside Sri Lanka maritime boundaries'
+            }), 400
 
-    Returns:
-        JSON with temperature data, coordinates, and metadata
-    """
-    try:
-        # Parse query parameters
-        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-        depth = float(request.args.get('depth', 0))
+        results = [{
+            'location': {'latitude': float(lat), 'longitude': float(lon)},
+            'date': date_str,
+            'data': {}
+        } for lat, lon in zip(lats, lons)]
 
-        # Fetch data (cached for 1 hour)
-        data = fetch_copernicus_data(
-            dataset_id=DATASETS['temperature'],
-            variables=('thetao',),  # Sea water potential temperature
-            start_date=date_str,
-            end_date=date_str,
-            depth=depth
-        )
+        # Fetch each requested dataset once and sample all points from it
+        for dataset_type in datasets:
+            dataset_type = dataset_type.strip()
+            if dataset_type in DATASETS:
+                try:
+                    served_date, cube = fetch_latest_cube(
+                        dataset_id=DATASETS[dataset_type],
+                        variables=DATASET_VARIABLES[dataset_type],
+                        start_date=date_str,
+                        end_date=date_str,
+                        depth=0 if dataset_type == 'waves' else depth
+                    )
+                    series = extract_point_series(cube, lats, lons, method)
+                    freshness = freshness_metadata(cube, date_str, served_date)
+
+                    for n, result in enumerate(results):
+                        result['data'][dataset_type] = {
+                            'status': 'available',
+                            'time': list(cube['time']),
+                            'values': {var: _nullable(values[:, n]) for var, values in series.items()},
+                            **freshness
+                        }
+                except Exception as e:
+                    logger.error(f"Error extracting {dataset_type} point data: {str(e)}")
+                    for result in results:
+                        result['data'][dataset_type] = {
+                            'status': 'error',
+                            'error': str(e)
+                        }
+
+        if points_str:
+            return jsonify({
+                'success': True,
+                'results': results
+            })
 
         return jsonify({
             'success': True,
-            'data': data,
-            'metadata': {
-                'dataset': 'Sea Surface Temperature',
-                'source': 'Copernicus Marine Service',
-                'date': date_str,
-                'depth': depth,
-                'units': '°C',
-                'bounds': SRI_LANKA_BOUNDS,
-                'cached': True
-            }
+            'result': results[0]
         })
 
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid latitude or longitude'
+        }), 400
     except Exception as e:
-        logger.error(f"Error in get_live_temperature: {str(e)}")
+        logger.error(f"Error in get_station_data: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
-@app.route('/api/ocean/currents/live', methods=['GET'])
-def get_live_currents():
+@app.route('/api/ocean/transect', methods=['GET'])
+def get_transect():
     """
-    Get live ocean current data (velocity components) for Sri Lanka waters
+    Get ocean conditions along a route (polyline)
+
+    The route is resampled every spacing_km and every dataset is sampled at
+    all points in one vectorized pass over its cached cube, so a route of any
+    length costs one fetch per dataset.
 
     Query Parameters:
+        path: Route vertices as "lat,lon;lat,lon;..." (at least two)
+        spacing_km: Optional distance between samples in km (default 5)
+        datasets: Comma-separated list (default "temperature,currents,waves")
         date: Optional date (YYYY-MM-DD), defaults to today
-        depth: Optional depth in meters, defaults to 0 (surface)
+        depth: Optional depth in meters (default 0, not used for waves)
+        method: Optional 'bilinear' (default) or 'nearest'
+        format: Optional 'bin' for the compact binary response (see ocean_encoding)
+        encoding: Optional 'int16' to pack binary values as int16 + validity bitmask
 
     Returns:
-        JSON with current velocity (U, V components), coordinates, and metadata
+        Columnar JSON: distance_km, latitude and longitude of the samples,
+        the sample index of each route vertex, and per dataset its time axis
+        and one (time x samples) array per variable
     """
     try:
         date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-        depth = float(request.args.get('depth', 0))
+        datasets = [name.strip() for name in
+                    request.args.get('datasets', ','.join(TRANSECT_DATASETS)).split(',') if name.strip()]
+        method = request.args.get('method', 'bilinear')
+
+        try:
+            path_lats, path_lons = parse_points(request.args.get('path', ''))
+            spacing_km = float(request.args.get('spacing_km', TRANSECT_SPACING_KM))
+            depth = float(request.args.get('depth', 0))
+            encoding = parse_encoding(request.args)
+            if len(path_lats) < 2:
+                raise ValueError('path needs at least two points')
+            if not math.isfinite(spacing_km) or spacing_km <= 0:
+                raise ValueError('spacing_km must be a positive number')
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid query parameter: {str(e)}'
+            }), 400
 
-        # Fetch U (eastward) and V (northward) velocity components
-        data = fetch_copernicus_data(
-            dataset_id=DATASETS['currents'],
-            variables=('uo', 'vo'),  # Eastward and northward velocities
-            start_date=date_str,
-            end_date=date_str,
-            depth=depth
-        )
+        if method not in ('nearest', 'bilinear'):
+            return jsonify({
+                'success': False,
+                'error': "Invalid method. Must be 'nearest' or 'bilinear'"
+            }), 400
+
+        invalid = [name for name in datasets if name not in DATASETS]
+        if invalid or not datasets:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid datasets. Must be one or more of: {", ".join(DATASETS.keys())}'
+            }), 400
 
-        # Calculate current speed and direction
-        if 'uo' in data and 'vo' in data:
-            u_values = np.array(data['uo']['values'])
-            v_values = np.array(data['vo']['values'])
+        # The route stays inside the box when its vertices do
+        if not np.all(in_sri_lanka_bounds(path_lats, path_lons)):
+            return jsonify({
+                'success': False,
+                'error': 'Route outside Sri Lanka maritime boundaries'
+            }), 400
 
-            # Speed (magnitude)
-            speed = np.sqrt(u_values**2 + v_values**2)
+        # Checked from the route length before any sample is allocated
+        samples = math.ceil(path_distances(path_lats, path_lons)[-1] / spacing_km) + len(path_lats)
+        if samples > TRANSECT_MAX_SAMPLES:
+            return jsonify({
+                'success': False,
+                'error': f'Route needs about {samples} samples at {spacing_km} km spacing '
+                         f'(at most {TRANSECT_MAX_SAMPLES}); increase spacing_km'
+            }), 400
 
-            # Direction (degrees from north)
-            direction = np.degrees(np.arctan2(u_values, v_values)) % 360
+        lats, lons, distances, vertices = resample_path(path_lats, path_lons, spacing_km)
 
-            data['speed'] = {
-                'values': np.nan_to_num(speed, nan=0.0).tolist(),
-                'min': float(np.nanmin(speed)),
-                'max': float(np.nanmax(speed)),
-                'mean': float(np.nanmean(speed)),
-                'units': 'm/s'
-            }
+        futures = {
+            name: fetch_pool.submit(
+                fetch_latest_cube, DATASETS[name], DATASET_VARIABLES[name],
+                date_str, date_str, 0 if name == 'waves' else depth
+            )
+            for name in dict.fromkeys(datasets)
+        }
 
-            data['direction'] = {
-                'values': np.nan_to_num(direction, nan=0.0).tolist(),
-                'units': 'degrees'
+        layers = {}
+        errors = {}
+        freshness = {}
+        for name, future in futures.items():
+            try:
+                served_date, cube = future.result()
+                freshness[name] = freshness_metadata(cube, date_str, served_date)
+                layers[name] = (list(cube['time']), extract_point_series(cube, lats, lons, method))
+            except Exception as e:
+                logger.error(f"Error sampling transect layer {name}: {str(e)}")
+                errors[name] = str(e)
+
+        if not layers:
+            return jsonify({
+                'success': False,
+                'error': 'No dataset could be fetched',
+                'errors': errors
+            }), 500
+
+        metadata = {
+            'source': 'Copernicus Marine Service',
+            'date': date_str,
+            'depth': depth,
+            'method': method,
+            'spacing_km': spacing_km,
+            'length_km': round(float(distances[-1]), 3),
+            'samples': len(lats),
+            'datasets': list(layers),
+            'stale': any(info['stale'] for info in freshness.values()),
+            'freshness': freshness
+        }
+
+        if wants_binary(request):
+            arrays = {'distance_km': distances, 'latitude': lats, 'longitude': lons,
+                      'vertices': vertices.astype(np.int32)}
+            encodings = {}
+            for name, (_, series) in layers.items():
+                packed, value_encoding = pack_values(
+                    {f'{name}/{var}': values.astype(np.float32) for var, values in series.items()}, encoding
+                )
+                arrays.update(packed)
+                encodings.update(value_encoding)
+            header = {
+                'success': True,
+                'layers': {name: {'time': times, 'variables': list(series)}
+                           for name, (times, series) in layers.items()},
+                'errors': errors,
+                'encoding': encodings,
+                'metadata': metadata
             }
+            with serialization_seconds.time(format='binary'):
+                payload = encode_arrays(arrays, header)
+            return Response(payload, mimetype=BINARY_MIMETYPE)
 
         return jsonify({
             'success': True,
-            'data': data,
-            'metadata': {
-                'dataset': 'Ocean Currents',
-                'source': 'Copernicus Marine Service',
-                'date': date_str,
-                'depth': depth,
-                'units': 'm/s',
-                'bounds': SRI_LANKA_BOUNDS,
-                'cached': True
-            }
+            'data': {
+                'distance_km': np.round(distances, 3).tolist(),
+                'latitude': np.round(lats, 5).tolist(),
+                'longitude': np.round(lons, 5).tolist(),
+                'vertices': vertices.tolist(),
+                'layers': {
+                    name: {
+                        'time': times,
+                        'values': {var: [_nullable(row) for row in values] for var, values in series.items()}
+                    }
+                    for name, (times, series) in layers.items()
+                }
+            },
+            'errors': errors,
+            'metadata': metadata
         })
 
     except Exception as e:
-        logger.error(f"Error in get_live_currents: {str(e)}")
+        logger.error(f"Error in get_transect: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
-@app.route('/api/ocean/waves/live', methods=['GET'])
-def get_live_waves():
+def cube_zonal_stats(cube, zone_set, variables, percentiles=ZONAL_PERCENTILES):
     """
-    Get live wave conditions for Sri Lanka waters
+    Per-zone statistics of cube variables (first depth level, every time step)
+
+    With the default percentiles each variable's statistics are computed once
+    per zone set version and kept with the cached cube; other percentiles are
+    computed per request, so client-chosen parameters cannot grow the cube.
+
+    Returns:
+        (zones, {variable: {statistic: (time, zone) array}}), or None when
+        the zone set does not exist
+    """
+    rasterized = zone_sets.labels(zone_set, cube['latitude'], cube['longitude'])
+    if rasterized is None:
+        return None
+    zones, labels, version = rasterized
+
+    keep = tuple(percentiles) == ZONAL_PERCENTILES
+    fields = dict(cube['variables'])
+    fields.update(cube_derived(cube))
+    n_times = len(cube['time'])
+    stats = {}
+    for var in variables:
+        key = (zone_set, version, var)
+        result = cube.get('zonal', {}).get(key) if keep else None
+        if result is None:
+            values = fields[var]
+            surface = values.reshape((n_times, -1) + values.shape[-2:])[:, 0]
+            result = zonal_stats(surface, labels, len(zones), percentiles)
+            if keep:
+                # The zones themselves are shared with zone_sets, so only the statistics are kept here
+                result = keep_cube_result(cube, 'zonal', key, result)
+        stats[var] = result
+    return zones, stats
+
+
+@app.route('/api/ocean/zonal', methods=['GET'])
+def get_zonal_stats():
+    """
+    Get per-zone statistics (fisheries districts, EEZ) of a cached dataset
+
+    Zones come from data/zones/<zones>.geojson (OCEAN_ZONES_DIR), rasterized
+    once onto the Copernicus grid; every zone is summarized in one pass over
+    the cached cube, so no grid has to be sent to the browser.
 
     Query Parameters:
+        zones: Zone set name (default "eez")
+        dataset: temperature, currents, waves or salinity (default temperature)
+        variables: Optional comma-separated variables (default: all except directions)
+        percentiles: Optional comma-separated percentiles 0-100 (default "10,50,90")
         date: Optional date (YYYY-MM-DD), defaults to today
+        depth: Optional depth in meters (default 0, not used for waves)
 
     Returns:
-        JSON with wave height, direction, period data
+        JSON with the zones (id, name, cells), the time axis and, per variable
+        and statistic (count, mean, min, max, p<q>), a (time x zones) array
     """
     try:
+        zone_set = request.args.get('zones', 'eez')
+        dataset_type = request.args.get('dataset', 'temperature')
         date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
 
-        # Fetch wave data
-        data = fetch_copernicus_data(
-            dataset_id=DATASETS['waves'],
-            variables=('VHM0', 'VMDR', 'VTPK'),  # Significant wave height, direction, peak period
+        if dataset_type not in DATASETS:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid dataset. Must be one of: {", ".join(DATASETS.keys())}'
+            }), 400
+
+        if zone_set not in zone_sets.names():
+            return jsonify({
+                'success': False,
+                'error': f'Unknown zone set. Available: {", ".join(zone_sets.names()) or "none"}'
+            }), 404
+
+        try:
+            depth = float(request.args.get('depth', 0))
+            percentiles = ZONAL_PERCENTILES
+            if request.args.get('percentiles'):
+                percentiles = tuple(float(q) for q in request.args['percentiles'].split(','))
+            if (not all(math.isfinite(q) and 0 <= q <= 100 for q in percentiles) or
+                    len(percentiles) > ZONAL_MAX_PERCENTILES):
+                raise ValueError(f'percentiles must be at most {ZONAL_MAX_PERCENTILES} values between 0 and 100')
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid query parameter: {str(e)}'
+            }), 400
+
+        served_date, cube = fetch_latest_cube(
+            dataset_id=DATASETS[dataset_type],
+            variables=DATASET_VARIABLES[dataset_type],
             start_date=date_str,
             end_date=date_str,
-            depth=0
+            depth=0 if dataset_type == 'waves' else depth
         )
 
+        # Directions are angles: a plain mean of them means nothing
+        available = [var for var in list(cube['variables']) + list(cube_derived(cube))
+                     if var not in DIRECTION_VARIABLES]
+        variables = available
+        if request.args.get('variables'):
+            variables = [var.strip() for var in request.args['variables'].split(',') if var.strip()]
+        invalid = [var for var in variables if var not in available]
+        if invalid or not variables:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid variables. Must be one or more of: {", ".join(available)}'
+            }), 400
+
+        zones, stats = cube_zonal_stats(cube, zone_set, variables, percentiles)
+        _, labels, _ = zone_sets.labels(zone_set, cube['latitude'], cube['longitude'])
+        cells = np.bincount(labels.ravel(), minlength=len(zones) + 1)[1:]
+
+        metadata = {
+            'dataset': dataset_type,
+            'source': 'Copernicus Marine Service',
+            'zones': zone_set,
+            'date': date_str,
+            'depth': 0 if dataset_type == 'waves' else depth,
+            'percentiles': list(percentiles),
+            'bounds': SRI_LANKA_BOUNDS
+        }
+        metadata.update(freshness_metadata(cube, date_str, served_date))
+
         return jsonify({
             'success': True,
-            'data': data,
-            'metadata': {
-                'dataset': 'Wave Conditions',
-                'source': 'Copernicus Marine Service',
-                'date': date_str,
+            'data': {
+                'zones': [{'id': zone['id'], 'name': zone['name'], 'cells': int(n)}
+                          for zone, n in zip(zones, cells)],
+                'time': list(cube['time']),
                 'variables': {
-                    'VHM0': 'Significant Wave Height (m)',
-                    'VMDR': 'Wave Direction (degrees)',
-                    'VTPK': 'Wave Peak Period (s)'
-                },
-                'bounds': SRI_LANKA_BOUNDS,
-                'cached': True
-            }
+                    var: {
+                        name: (values.astype(int).tolist() if name == 'count' else
+                               [_nullable(row) for row in values])
+                        for name, values in var_stats.items()
+                    }
+                    for var, var_stats in stats.items()
+                }
+            },
+            'metadata': metadata
         })
 
     except Exception as e:
-        logger.error(f"Error in get_live_waves: {str(e)}")
+        logger.error(f"Error in get_zonal_stats: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
-@app.route('/api/ocean/salinity/live', methods=['GET'])
-def get_live_salinity():
+def extract_profiles(cube, lats, lons, max_depth, method='nearest'):
     """
-    Get live sea water salinity for Sri Lanka waters
-
-    Query Parameters:
-        date: Optional date (YYYY-MM-DD), defaults to today
-        depth: Optional depth in meters, defaults to 0 (surface)
+    Sample the depth column of every cube variable at many points
 
     Returns:
-        JSON with salinity data (PSU - Practical Salinity Units)
+        (depth levels down to max_depth, dict of variable -> array of shape
+        (n_depths, n_points)) for the first time step
     """
-    try:
-        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-        depth = float(request.args.get('depth', 0))
+    depth = cube['depth']
+    n_levels = max(int(np.searchsorted(depth, max_depth, side='right')), 1)
 
-        data = fetch_copernicus_data(
-            dataset_id=DATASETS['salinity'],
-            variables=('so',),  # Sea water salinity
-            start_date=date_str,
-            end_date=date_str,
-            depth=depth
-        )
+    sections = {}
+    for var, values in cube['variables'].items():
+        column = values[0, :n_levels]
+        sections[var] = sample_points(column, cube['latitude'], cube['longitude'], lats, lons, method)
 
-        return jsonify({
-            'success': True,
-            'data': data,
-            'metadata': {
-                'dataset': 'Sea Water Salinity',
-                'source': 'Copernicus Marine Service',
-                'date': date_str,
-                'depth': depth,
-                'units': 'PSU',
-                'bounds': SRI_LANKA_BOUNDS,
-                'cached': True
-            }
-        })
+    if 'uo' in sections and 'vo' in sections:
+        sections['speed'], sections['direction'] = current_speed_direction(sections['uo'], sections['vo'])
 
-    except Exception as e:
-        logger.error(f"Error in get_live_salinity: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return depth[:n_levels], sections
 
 
-@app.route('/api/ocean/historical', methods=['GET'])
-def get_historical_data():
+@app.route('/api/ocean/profile', methods=['GET'])
+def get_depth_profile():
     """
-    Get historical ocean data for a specified time range
+    Get vertical profiles (or a depth section along several points)
+
+    The whole depth column is fetched in one upstream call and cached as a
+    3-D cube; every profile and section is sliced from it.
 
     Query Parameters:
-        dataset: temperature, currents, waves, or salinity
-        start_date: Start date (YYYY-MM-DD)
-        end_date: End date (YYYY-MM-DD)
-        depth: Optional depth in meters (default 0)
-        lat: Optional specific latitude
-        lon: Optional specific longitude
+        dataset: 'temperature' (default), 'salinity' or 'currents'
+        lat: Latitude
+        lon: Longitude
+        points: Alternative to lat/lon, a section through "lat,lon;lat,lon;..."
+        max_depth: Optional deepest level in meters (default 500)
+        date: Optional date (YYYY-MM-DD), defaults to today
+        method: Optional 'nearest' (default) or 'bilinear'
 
     Returns:
-        JSON with historical time series data
+        JSON with the depth levels and, per variable, one value per depth
+        (point) or one row of point values per depth (section)
     """
     try:
         dataset_type = request.args.get('dataset', 'temperature')
-        start_date = request.args.get('start_date', (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d'))
-        end_date = request.args.get('end_date', datetime.now().strftime('%Y-%m-%d'))
-        depth = float(request.args.get('depth', 0))
+        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        method = request.args.get('method', 'nearest')
 
-        # Get dataset configuration
-        if dataset_type not in DATASETS:
+        if dataset_type not in PROFILE_DATASETS:
             return jsonify({
                 'success': False,
-                'error': f'Invalid dataset type. Must be one of: {", ".join(DATASETS.keys())}'
+                'error': f'Invalid dataset. Must be one of: {", ".join(PROFILE_DATASETS)}'
             }), 400
 
-        # Determine variables based on dataset type
-        variable_map = {
-            'temperature': ('thetao',),
-            'currents': ('uo', 'vo'),
-            'waves': ('VHM0', 'VMDR', 'VTPK'),
-            'salinity': ('so',)
-        }
+        if method not in ('nearest', 'bilinear'):
+            return jsonify({
+                'success': False,
+                'error': "Invalid method. Must be 'nearest' or 'bilinear'"
+            }), 400
 
-        variables = variable_map[dataset_type]
+        try:
+            points_str = request.args.get('points')
+            if points_str:
+                lats, lons = parse_points(points_str)
+            else:
+                lats = np.array([float(request.args.get('lat'))])
+                lons = np.array([float(request.args.get('lon'))])
+            max_depth = float(request.args.get('max_depth', 500))
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid lat, lon, points or max_depth'
+            }), 400
+
+        if not 0 < max_depth <= PROFILE_COLUMN_DEPTHS[-1]:
+            return jsonify({
+                'success': False,
+                'error': f'max_depth must be between 0 and {PROFILE_COLUMN_DEPTHS[-1]:.0f} meters'
+            }), 400
+
+        if not np.all(in_sri_lanka_bounds(lats, lons)):
+            return jsonify({
+                'success': False,
+                'error': 'Location outside Sri Lanka maritime boundaries'
+            }), 400
 
-        data = fetch_copernicus_data(
+        column_depth = next(d for d in PROFILE_COLUMN_DEPTHS if d >= max_depth)
+        served_date, cube = fetch_latest_cube(
             dataset_id=DATASETS[dataset_type],
-            variables=variables,
-            start_date=start_date,
-            end_date=end_date,
-            depth=depth
+            variables=DATASET_VARIABLES[dataset_type],
+            start_date=date_str,
+            end_date=date_str,
+            depth=0,
+            max_depth=column_depth
         )
+        depth, sections = extract_profiles(cube, lats, lons, max_depth, method)
+
+        metadata = {
+            'dataset': dataset_type,
+            'source': 'Copernicus Marine Service',
+            'date': date_str,
+            'time': cube['time'][0],
+            'max_depth': max_depth,
+            'depth_levels': len(depth),
+            'units': PROFILE_UNITS[dataset_type],
+            'method': method
+        }
+        metadata.update(freshness_metadata(cube, date_str, served_date))
+
+        if points_str:
+            return jsonify({
+                'success': True,
+                'data': {
+                    'points': [{'latitude': float(lat), 'longitude': float(lon)} for lat, lon in zip(lats, lons)],
+                    'distance_km': path_distances(lats, lons).tolist(),
+                    'depth': depth.tolist(),
+                    'values': {var: [_nullable(row) for row in values] for var, values in sections.items()}
+                },
+                'metadata': metadata
+            })
 
         return jsonify({
             'success': True,
-            'data': data,
-            'metadata': {
-                'dataset': dataset_type.title(),
-                'source': 'Copernicus Marine Service',
-                'start_date': start_date,
-                'end_date': end_date,
-                'depth': depth,
-                'bounds': SRI_LANKA_BOUNDS
-            }
+            'data': {
+                'location': {'latitude': float(lats[0]), 'longitude': float(lons[0])},
+                'depth': depth.tolist(),
+                'values': {var: _nullable(values[:, 0]) for var, values in sections.items()}
+            },
+            'metadata': metadata
         })
 
     except Exception as e:
-        logger.error(f"Error in get_historical_data: {str(e)}")
+        logger.error(f"Error in get_depth_profile: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
-@app.route('/api/ocean/station', methods=['GET'])
-def get_station_data():
+@app.route('/api/ocean/timeseries', methods=['GET'])
+def get_point_timeseries():
     """
-    Get ocean data for a specific station/location
+    Get a long surface time series at one location from the local archive
+
+    Never calls Copernicus: days that have not been ingested are null.
 
     Query Parameters:
         lat: Latitude
         lon: Longitude
-        date: Optional date (YYYY-MM-DD)
-        datasets: Comma-separated list (e.g., "temperature,currents,waves")
+        dataset: temperature (default), currents, waves, or salinity
+        start_date: Optional start date (YYYY-MM-DD), defaults to one year ago
+        end_date: Optional end date (YYYY-MM-DD), defaults to today
 
     Returns:
-        JSON with all requested data for the specific location
+        JSON with the time axis and one value list per variable, taken at
+        the grid cell nearest to the location
     """
     try:
-        lat = float(request.args.get('lat'))
-        lon = float(request.args.get('lon'))
-        date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-        datasets = request.args.get('datasets', 'temperature,currents,waves').split(',')
+        dataset_type = request.args.get('dataset', 'temperature')
+        start_date = request.args.get('start_date', (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'))
+        end_date = request.args.get('end_date', datetime.now().strftime('%Y-%m-%d'))
 
-        result = {
-            'location': {'latitude': lat, 'longitude': lon},
-            'date': date_str,
-            'data': {}
-        }
+        if dataset_type not in DATASETS:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid dataset type. Must be one of: {", ".join(DATASETS.keys())}'
+            }), 400
 
-        # Validate location is within Sri Lanka EEZ
-        if not (SRI_LANKA_BOUNDS['min_lat'] <= lat <= SRI_LANKA_BOUNDS['max_lat'] and
-                SRI_LANKA_BOUNDS['min_lon'] <= lon <= SRI_LANKA_BOUNDS['max_lon']):
+        try:
+            lat = float(request.args.get('lat'))
+            lon = float(request.args.get('lon'))
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid latitude or longitude'
+            }), 400
+
+        if not in_sri_lanka_bounds(np.array([lat]), np.array([lon]))[0]:
             return jsonify({
                 'success': False,
                 'error': 'Location outside Sri Lanka maritime boundaries'
             }), 400
 
-        # Fetch each requested dataset
-        for dataset_type in datasets:
-            dataset_type = dataset_type.strip()
-            if dataset_type in DATASETS:
-                try:
-                    # This would need more sophisticated point extraction
-                    # For now, fetch the full grid and extract nearest point
-                    logger.info(f"Fetching {dataset_type} for point ({lat}, {lon})")
-                    result['data'][dataset_type] = {
-                        'status': 'available',
-                        'note': 'Point extraction not yet implemented, use grid data'
-                    }
-                except Exception as e:
-                    result['data'][dataset_type] = {
-                        'status': 'error',
-                        'error': str(e)
-                    }
+        try:
+            n_days = (datetime.strptime(end_date, '%Y-%m-%d') - datetime.strptime(start_date, '%Y-%m-%d')).days + 1
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid date range: {str(e)}'
+            }), 400
+
+        if not 0 < n_days <= TIMESERIES_MAX_DAYS:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid date range. Must cover 1 to {TIMESERIES_MAX_DAYS} days'
+            }), 400
+
+        series = ocean_archive.read_point(dataset_type, lat, lon, start_date, end_date)
+        if series is None:
+            return jsonify({
+                'success': False,
+                'error': f'No archived {dataset_type} data. Run ingest_ocean_archive.py to build the archive'
+            }), 404
+
+        values = series['values']
+        if 'uo' in values and 'vo' in values:
+            values['speed'], values['direction'] = current_speed_direction(values['uo'], values['vo'])
 
         return jsonify({
             'success': True,
-            'result': result
+            'data': {
+                'location': {'latitude': lat, 'longitude': lon},
+                'cell': {'latitude': series['latitude'], 'longitude': series['longitude']},
+                'time': series['time'],
+                'values': {var: _nullable(v) for var, v in values.items()}
+            },
+            'metadata': {
+                'dataset': dataset_type,
+                'source': 'Local archive of Copernicus Marine Service data',
+                'start_date': start_date,
+                'end_date': end_date,
+                'requested_days': n_days,
+                'archived_days': series['archived_days']
+            }
         })
 
-    except ValueError as e:
-        return jsonify({
-            'success': False,
-            'error': 'Invalid latitude or longitude'
-        }), 400
     except Exception as e:
-        logger.error(f"Error in get_station_data: {str(e)}")
+        logger.error(f"Error in get_point_timeseries: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -547,12 +3027,24 @@ if __name__ == '__main__':
     logger.info(f"Sri Lanka Bounds: {SRI_LANKA_BOUNDS}")
     logger.info("Available endpoints:")
     logger.info("  - GET /api/health")
+    logger.info("  - GET /api/cache/stats")
+    logger.info("  - GET /api/metrics")
     logger.info("  - GET /api/ocean/temperature/live")
+    logger.info("  - GET /api/ocean/temperature/anomaly")
+    logger.info("  - GET /api/ocean/fronts")
     logger.info("  - GET /api/ocean/currents/live")
+    logger.info("  - GET /api/ocean/currents/arrows")
+    logger.info("  - GET /api/ocean/currents/streamlines")
     logger.info("  - GET /api/ocean/waves/live")
     logger.info("  - GET /api/ocean/salinity/live")
+    logger.info("  - GET /api/ocean/bundle")
     logger.info("  - GET /api/ocean/historical")
+    logger.info("  - GET /api/ocean/timeseries")
     logger.info("  - GET /api/ocean/station")
+    logger.info("  - GET /api/ocean/transect")
+    logger.info("  - GET /api/ocean/zonal")
+    logger.info("  - GET /api/ocean/profile")
+    logger.info("  - GET /api/ocean/tiles/<layer>/<z>/<x>/<y>.png")
     logger.info("  - GET /api/datasets")
 
     # Run Flask app
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Nightly Ocean Archive Ingestion
+Appends each day's temperature, salinity, currents and waves cubes to the
+local archive (see ocean_archive.py) that serves long historical and
+time-series queries, and folds new temperature days into the SST
+climatology (see ocean_climatology.py).
+
+Run nightly from cron (yesterday's products are final by then):
+    30 2 * * * cd /path/to/backend && /usr/bin/python3 ingest_ocean_archive.py >> ocean_ingest.log 2>&1
+
+Backfill a range:
+    python3 ingest_ocean_archive.py --start 2024-01-01 --end 2024-12-31
+
+Recompute the climatology from everything archived so far:
+    python3 ingest_ocean_archive.py --rebuild-climatology
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# A one-off batch job: leave live prefetching to the API processes
+os.environ.setdefault('OCEAN_PREFETCH', '0')
+
+# Reuses the API's data source and parallel day fetching. Days are read fresh
+# from the source, bypassing the live cube cache: a backfill must not evict the
+# live cubes, and a cached day may be a stale forecast
+from copernicus_flask_api import (DATASETS, DATASET_VARIABLES, date_range, iter_day_cubes,
+                                  ocean_archive, sst_climatology)
+
+logger = logging.getLogger('ingest_ocean_archive')
+
+# Days written per chunk rewrite during backfills
+BATCH_DAYS = 31
+
+# Climatologies updated from newly archived days
+CLIMATOLOGIES = {'temperature': sst_climatology}
+
+
+def ingest(dataset_type, dates, force=False):
+    """Archive the given days of one dataset; returns (ingested, skipped, failed)"""
+    if not force:
+        archived = ocean_archive.has_days(dataset_type, dates)
+        skipped = sum(archived)
+        dates = [date_str for date_str, done in zip(dates, archived) if not done]
+    else:
+        skipped = 0
+
+    ingested = failed = 0
+    batch = {}
+
+    def flush():
+        nonlocal ingested, failed
+        try:
+            ocean_archive.append_days(dataset_type, batch)
+            if dataset_type in CLIMATOLOGIES:
+                CLIMATOLOGIES[dataset_type].add_days(batch)
+            ingested += len(batch)
+        except Exception as e:
+            logger.error(f"Could not archive {dataset_type} for {min(batch)} to {max(batch)}: {str(e)}")
+            failed += len(batch)
+        batch.clear()
+
+    days = iter_day_cubes(DATASETS[dataset_type], DATASET_VARIABLES[dataset_type], dates, depth=0,
+                          use_cache=False)
+    for date_str, cube, error in days:
+        if error is not None:
+            logger.error(f"Could not fetch {dataset_type} for {date_str}: {str(error)}")
+            failed += 1
+            continue
+        batch[date_str] = cube
+        if len(batch) >= BATCH_DAYS:
+            flush()
+    if batch:
+        flush()
+
+    return ingested, skipped, failed
+
+
+def rebuild_climatology(dataset_type):
+    """Recompute a climatology from every archived day"""
+    climatology = CLIMATOLOGIES[dataset_type]
+    climatology.clear()
+    coverage = ocean_archive.coverage(dataset_type)
+    if not coverage or not coverage['days']:
+        logger.warning(f"No archived {dataset_type} days to build a climatology from")
+        return 0
+
+    dates = date_range(coverage['first'], coverage['last'])
+    added = 0
+    for n in range(0, len(dates), BATCH_DAYS):
+        added += climatology.add_days(ocean_archive.read_days(dataset_type, dates[n:n + BATCH_DAYS]))
+    logger.info(f"{dataset_type} climatology rebuilt from {added} archived day(s)")
+    return added
+
+
+def main():
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+
+    parser = argparse.ArgumentParser(description='Append daily ocean cubes to the local archive')
+    parser.add_argument('--start', default=yesterday, help='First day (YYYY-MM-DD), default yesterday')
+    parser.add_argument('--end', help='Last day (YYYY-MM-DD), default same as --start')
+    parser.add_argument('--datasets', default=','.join(DATASETS),
+                        help='Comma-separated datasets (default: all)')
+    parser.add_argument('--force', action='store_true', help='Re-ingest days that are already archived')
+    parser.add_argument('--rebuild-climatology', action='store_true',
+                        help='Recompute the climatologies from the archive instead of ingesting')
+    args = parser.parse_args()
+
+    if args.rebuild_climatology:
+        for dataset_type in CLIMATOLOGIES:
+            rebuild_climatology(dataset_type)
+        return 0
+
+    dates = date_range(args.start, args.end or args.start)
+    started = time.time()
+    failures = 0
+
+    logger.info(f"Archiving {len(dates)} day(s) from {dates[0]} to {dates[-1]} into {ocean_archive.root}")
+    for dataset_type in args.datasets.split(','):
+        dataset_type = dataset_type.strip()
+        if dataset_type not in DATASETS:
+            logger.error(f"Unknown dataset {dataset_type}")
+            failures += 1
+            continue
+        ingested, skipped, failed = ingest(dataset_type, dates, args.force)
+        failures += failed
+        logger.info(f"{dataset_type}: {ingested} ingested, {skipped} already archived, {failed} failed")
+
+    logger.info(f"Archive ingestion finished in {time.time() - started:.1f}s")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
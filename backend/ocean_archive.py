@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Ocean Data Archive
+Local, time-major chunked store of the daily Copernicus cubes.
+
+Each dataset gets a directory holding its grid and one compressed .npz chunk
+per (variable, year, time segment, spatial block). A chunk spans a segment of
+32 day slots of a calendar year (366 slots) for a small lat/lon block, so a
+single-point series reads 12 small chunks per year, appending a day rewrites
+only the chunks of its segment, and a day is located by arithmetic (day of
+year, segment, block index) without any index files:
+
+    <root>/<dataset>/meta.json                grid, variables, per-day layout
+    <root>/<dataset>/<variable>/<year>_<s>_<i>_<j>.npz
+    <root>/<dataset>/<year>.days.npy         which day slots are filled
+
+Archives written before segments were introduced keep one chunk per year
+(<year>_<i>_<j>.npz, no 'segment' in meta.json) and are read as before.
+
+Days are appended by the nightly ingestion job (ingest_ocean_archive.py);
+the API only reads.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ocean_grid import nearest_index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'ocean-archive')
+DEFAULT_BLOCK = 16  # grid cells per chunk side
+DEFAULT_SEGMENT = 32  # day slots per chunk
+DEFAULT_CHUNK_CACHE_BYTES = 64 * 1024 * 1024
+YEAR_SLOTS = 366
+
+
+def _day_slot(date: datetime) -> int:
+    return date.timetuple().tm_yday - 1
+
+
+def _segment_days(meta: Dict) -> int:
+    """Day slots per chunk of an archived dataset (a whole year for older archives)"""
+    return meta.get('segment', YEAR_SLOTS)
+
+
+def atomic_save(path: str, save):
+    """Write through a temp file and rename so readers never see partial data"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            save(f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class OceanArchive:
+    """Append-by-day, read-by-range archive of daily ocean cubes"""
+
+    def __init__(self, root: Optional[str] = None, block: int = DEFAULT_BLOCK,
+                 chunk_cache_bytes: Optional[int] = None, segment: int = DEFAULT_SEGMENT):
+        self.root = root or os.environ.get('OCEAN_ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR)
+        self.block = block
+        self.segment = segment
+        self.chunk_cache_bytes = chunk_cache_bytes if chunk_cache_bytes is not None else int(
+            os.environ.get('OCEAN_ARCHIVE_CACHE_BYTES', DEFAULT_CHUNK_CACHE_BYTES)
+        )
+        self._chunks = OrderedDict()  # (path, mtime) -> decompressed chunk
+        self._chunk_bytes = 0
+        self._meta = {}
+        self._lock = threading.Lock()
+
+    # ---- layout -------------------------------------------------------------
+
+    def _dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _chunk_path(self, name: str, var: str, year: int, seg: int, bi: int, bj: int,
+                    meta: Dict) -> str:
+        if _segment_days(meta) >= YEAR_SLOTS:
+            return os.path.join(self._dir(name), var, f"{year}_{bi}_{bj}.npz")
+        return os.path.join(self._dir(name), var, f"{year}_{seg}_{bi}_{bj}.npz")
+
+    def _days_path(self, name: str, year: int) -> str:
+        return os.path.join(self._dir(name), f"{year}.days.npy")
+
+    def meta(self, name: str) -> Optional[Dict]:
+        """Grid and layout of an archived dataset (None if nothing is archived)"""
+        meta = self._meta.get(name)
+        if meta is None:
+            path = os.path.join(self._dir(name), 'meta.json')
+            if not os.path.exists(path):
+                return None
+            with open(path) as f:
+                meta = json.load(f)
+            meta['latitude'] = np.array(meta['latitude'])
+            meta['longitude'] = np.array(meta['longitude'])
+            self._meta[name] = meta
+        return meta
+
+    def _write_meta(self, name: str, cube: Dict, date: datetime):
+        offsets = [(datetime.fromisoformat(str(t)) - date).total_seconds() / 3600 for t in cube['time']]
+        meta = {
+            'variables': sorted(cube['variables']),
+            'day_shape': list(next(iter(cube['variables'].values())).shape[:-2]),
+            'time_offsets': offsets,
+            'block': self.block,
+            'segment': self.segment,
+            'latitude': cube['latitude'].tolist(),
+            'longitude': cube['longitude'].tolist()
+        }
+        atomic_save(os.path.join(self._dir(name), 'meta.json'),
+                     lambda f: f.write(json.dumps(meta).encode('utf-8')))
+        self._meta.pop(name, None)
+        return self.meta(name)
+
+    # ---- chunks -------------------------------------------------------------
+
+    def _load_chunk(self, path: str) -> Optional[np.ndarray]:
+        """Decompressed chunk (read-only, shared through the chunk cache), or None"""
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+
+        key = (path, mtime)
+        with self._lock:
+            chunk = self._chunks.get(key)
+            if chunk is not None:
+                self._chunks.move_to_end(key)
+                return chunk
+
+        with np.load(path, allow_pickle=False) as npz:
+            chunk = npz['values']
+        chunk.setflags(write=False)
+
+        with self._lock:
+            if key not in self._chunks and chunk.nbytes <= self.chunk_cache_bytes:
+                self._chunks[key] = chunk
+                self._chunk_bytes += chunk.nbytes
+                while self._chunk_bytes > self.chunk_cache_bytes:
+                    _, old = self._chunks.popitem(last=False)
+                    self._chunk_bytes -= old.nbytes
+        return chunk
+
+    def _forget(self, path: str):
+        """Drop cached copies of a chunk that was just rewritten"""
+        with self._lock:
+            for key in [key for key in self._chunks if key[0] == path]:
+                self._chunk_bytes -= self._chunks.pop(key).nbytes
+
+    def _blocks(self, meta: Dict):
+        """(bi, bj, lat slice, lon slice) of every spatial block"""
+        block = meta['block']
+        n_lat, n_lon = len(meta['latitude']), len(meta['longitude'])
+        for bi in range(-(-n_lat // block)):
+            for bj in range(-(-n_lon // block)):
+                yield (bi, bj, slice(bi * block, min((bi + 1) * block, n_lat)),
+                       slice(bj * block, min((bj + 1) * block, n_lon)))
+
+    # ---- writing ------------------------------------------------------------
+
+    def append(self, name: str, date_str: str, cube: Dict):
+        """Store one day's cube, overwriting that day if it was archived before"""
+        self.append_days(name, {date_str: cube})
+
+    def append_days(self, name: str, cubes: Dict[str, Dict]):
+        """
+        Store several days (date -> cube), rewriting each affected chunk once;
+        chunks of segments without a new day are left untouched
+
+        Every cube must be on the dataset's archived grid and have the same
+        per-day layout (depth levels, time steps) as earlier days.
+        """
+        if not cubes:
+            return
+        days = sorted((datetime.strptime(date_str, '%Y-%m-%d'), cube) for date_str, cube in cubes.items())
+
+        meta = self.meta(name)
+        if meta is None:
+            meta = self._write_meta(name, days[0][1], days[0][0])
+        day_shape = tuple(meta['day_shape'])
+
+        for date, cube in days:
+            if not (np.array_equal(meta['latitude'], cube['latitude']) and
+                    np.array_equal(meta['longitude'], cube['longitude'])):
+                raise ValueError(f"{name} cube for {date:%Y-%m-%d} is not on the archived grid")
+            for var in meta['variables']:
+                values = cube['variables'].get(var)
+                if values is None or values.shape[:-2] != day_shape:
+                    raise ValueError(f"{name} cube for {date:%Y-%m-%d} has no {var} with day shape {day_shape}")
+
+        segment = _segment_days(meta)
+        by_year = {}
+        for date, cube in days:
+            by_year.setdefault(date.year, []).append((_day_slot(date), cube))
+
+        for year, entries in by_year.items():
+            by_segment = {}
+            for slot, cube in entries:
+                by_segment.setdefault(slot // segment, []).append((slot, cube))
+
+            # Only the chunks of segments holding a new day are rewritten
+            for seg, seg_entries in by_segment.items():
+                first = seg * segment
+                n_slots = min(first + segment, YEAR_SLOTS) - first
+                for var in meta['variables']:
+                    for bi, bj, lat_slice, lon_slice in self._blocks(meta):
+                        path = self._chunk_path(name, var, year, seg, bi, bj, meta)
+                        existing = self._load_chunk(path)
+                        if existing is None:
+                            shape = (n_slots,) + day_shape + (lat_slice.stop - lat_slice.start,
+                                                              lon_slice.stop - lon_slice.start)
+                            chunk = np.full(shape, np.nan, dtype=np.float32)
+                        else:
+                            chunk = existing.copy()
+                        for slot, cube in seg_entries:
+                            chunk[slot - first] = cube['variables'][var][..., lat_slice, lon_slice]
+                        atomic_save(path, lambda f: np.savez_compressed(f, values=chunk))
+                        self._forget(path)
+
+            filled = self._filled(name, year).copy()
+            filled[[slot for slot, _ in entries]] = True
+            atomic_save(self._days_path(name, year), lambda f: np.save(f, filled))
+
+    # ---- reading ------------------------------------------------------------
+
+    def _filled(self, name: str, year: int) -> np.ndarray:
+        path = self._days_path(name, year)
+        return np.load(path) if os.path.exists(path) else np.zeros(YEAR_SLOTS, dtype=bool)
+
+    def has_days(self, name: str, dates: Iterable[str]) -> List[bool]:
+        """Whether each YYYY-MM-DD date is archived"""
+        filled = {}
+        result = []
+        for date_str in dates:
+            date = datetime.strptime(date_str, '%Y-%m-%d')
+            if date.year not in filled:
+                filled[date.year] = self._filled(name, date.year)
+            result.append(bool(filled[date.year][_day_slot(date)]))
+        return result
+
+    def coverage(self, name: str) -> Optional[Dict]:
+        """First/last archived day and the number of archived days"""
+        meta = self.meta(name)
+        if meta is None:
+            return None
+        days = []
+        for entry in sorted(os.listdir(self._dir(name))):
+            if entry.endswith('.days.npy'):
+                year = int(entry.split('.')[0])
+                slots = np.flatnonzero(self._filled(name, year))
+                days.extend(datetime(year, 1, 1) + timedelta(days=int(s)) for s in slots)
+        return {
+            'days': len(days),
+            'first': days[0].strftime('%Y-%m-%d') if days else None,
+            'last': days[-1].strftime('%Y-%m-%d') if days else None
+        }
+
+    def _times(self, meta: Dict, date: datetime) -> List[str]:
+        return [(date + timedelta(hours=h)).strftime('%Y-%m-%d %H:%M:%S') for h in meta['time_offsets']]
+
+    def read_days(self, name: str, dates: List[str]) -> Dict[str, Dict]:
+        """
+        Cubes for the archived days among dates, in the same layout as the
+        fetched cubes, reading each chunk once
+
+        Returns:
+            Dict of date -> cube (days not in the archive are left out)
+        """
+        meta = self.meta(name)
+        if meta is None:
+            return {}
+
+        archived = [d for d, ok in zip(dates, self.has_days(name, dates)) if ok]
+        day_shape = tuple(meta['day_shape'])
+        grid_shape = (len(meta['latitude']), len(meta['longitude']))
+        cubes = {
+            date_str: {
+                'variables': {var: np.empty(day_shape + grid_shape, dtype=np.float32)
+                              for var in meta['variables']},
+                'latitude': meta['latitude'],
+                'longitude': meta['longitude'],
+                'time': self._times(meta, datetime.strptime(date_str, '%Y-%m-%d'))
+            }
+            for date_str in archived
+        }
+
+        segment = _segment_days(meta)
+        by_chunk = {}
+        for date_str in archived:
+            date = datetime.strptime(date_str, '%Y-%m-%d')
+            slot = _day_slot(date)
+            by_chunk.setdefault((date.year, slot // segment), []).append((date_str, slot % segment))
+
+        for (year, seg), days in by_chunk.items():
+            for var in meta['variables']:
+                for bi, bj, lat_slice, lon_slice in self._blocks(meta):
+                    chunk = self._load_chunk(self._chunk_path(name, var, year, seg, bi, bj, meta))
+                    for date_str, offset in days:
+                        target = cubes[date_str]['variables'][var]
+                        if chunk is None:
+                            target[..., lat_slice, lon_slice] = np.nan
+                        else:
+                            target[..., lat_slice, lon_slice] = chunk[offset]
+        return cubes
+
+    def iter_days(self, name: str, dates: List[str]) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        Yield (date, cube) for each date, in order, reading one time segment
+        (at most DEFAULT_SEGMENT days) only when the generator reaches it, so
+        long ranges are streamed with flat memory
+
+        The cube is None for days not in the archive.
+        """
+        meta = self.meta(name)
+        batch = min(_segment_days(meta), DEFAULT_SEGMENT) if meta else DEFAULT_SEGMENT
+
+        def batch_key(date_str):
+            date = datetime.strptime(date_str, '%Y-%m-%d')
+            return date.year, _day_slot(date) // batch
+
+        for _, group in groupby(dates, key=batch_key):
+            group = list(group)
+            cubes = self.read_days(name, group) if meta else {}
+            for date_str in group:
+                yield date_str, cubes.pop(date_str, None)
+
+    def read_point(self, name: str, lat: float, lon: float,
+                   start_date: str, end_date: str) -> Optional[Dict]:
+        """
+        Time series at the grid cell nearest to (lat, lon)
+
+        Reads one chunk per variable and time segment in the range.
+
+        Returns:
+            Dict with 'time' (list of strings), 'latitude'/'longitude' of the
+            cell, 'archived_days' and 'values' (variable -> float32 array over
+            time, NaN where the day is not archived); None if the dataset is
+            not archived
+        """
+        meta = self.meta(name)
+        if meta is None:
+            return None
+
+        block = meta['block']
+        segment = _segment_days(meta)
+        i = int(nearest_index(meta['latitude'], lat))
+        j = int(nearest_index(meta['longitude'], lon))
+        bi, bj, ii, jj = i // block, j // block, i % block, j % block
+
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        steps = int(np.prod(meta['day_shape'])) if meta['day_shape'] else 1
+
+        times = []
+        archived_days = 0
+        values = {var: [] for var in meta['variables']}
+        for year in range(start.year, end.year + 1):
+            first = max(start, datetime(year, 1, 1))
+            last = min(end, datetime(year, 12, 31))
+            slots = np.arange(_day_slot(first), _day_slot(last) + 1)
+            filled = self._filled(name, year)[slots]
+            archived_days += int(filled.sum())
+
+            for n in range(len(slots)):
+                times.extend(self._times(meta, first + timedelta(days=n)))
+
+            for var in meta['variables']:
+                series = np.full((len(slots), steps), np.nan, dtype=np.float32)
+                for seg in np.unique(slots // segment):
+                    chunk = self._load_chunk(self._chunk_path(name, var, year, int(seg), bi, bj, meta))
+                    if chunk is not None:
+                        in_seg = slots // segment == seg
+                        series[in_seg] = chunk[slots[in_seg] - seg * segment][..., ii, jj].reshape(-1, steps)
+                series[~filled] = np.nan
+                values[var].append(series.reshape(-1))
+
+        return {
+            'time': times,
+            'latitude': float(meta['latitude'][i]),
+            'longitude': float(meta['longitude'][j]),
+            'archived_days': archived_days,
+            'values': {var: np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+                       for var, parts in values.items()}
+        }
+
+    def snapshot(self) -> Dict:
+        """Chunk cache usage"""
+        with self._lock:
+            return {
+                'root': self.root,
+                'cached_chunks': len(self._chunks),
+                'cached_bytes': self._chunk_bytes,
+                'cache_max_bytes': self.chunk_cache_bytes
+            }
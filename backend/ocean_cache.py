@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+Ocean Data Cube Cache
+Persistent on-disk cache for Copernicus Marine cubes, shared by all API workers.
+
+Each entry is one fetched cube (data variables, fields derived from them at
+fetch time, and coordinates) stored as a compressed .npz file. Arrays are kept
+as float32 with NaN for missing cells; the JSON layer decides how to present
+them.
+
+Expired cubes are kept for a further stale window so they can still be
+served while a fresh copy is fetched (stale-while-revalidate), and failed
+fetches are remembered for a short while (negative caching) so an upstream
+outage is not retried by every request.
+"""
+
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Defaults (overridable through environment variables)
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'nara-ocean-cache')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB on disk
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024  # 256 MB decoded arrays per worker
+DEFAULT_STALE_SECONDS = 2 * 24 * 3600  # expired cubes stay servable for two days
+DEFAULT_FAILURE_SECONDS = 120  # failed fetches are not retried for two minutes
+
+VAR_PREFIX = 'var__'
+DERIVED_PREFIX = 'derived__'
+
+
+def make_cache_key(*parts) -> str:
+    """Build a stable, filesystem-safe key from the fetch parameters"""
+    raw = '|'.join(
+        ','.join(str(p) for p in part) if isinstance(part, (tuple, list)) else str(part)
+        for part in parts
+    )
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def object_nbytes(obj) -> int:
+    """Approximate memory held by a derived result (arrays, dicts, lists, tuples, scalars)"""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(object_nbytes(k) + object_nbytes(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(object_nbytes(v) for v in obj)
+    return size
+
+
+def attach_result(cube: Dict, kind: str, key, result) -> object:
+    """
+    Keep a result derived from a cube (fronts, vectors, zonal statistics, ...)
+    in cube[kind][key] and add its size to the cube's 'result_nbytes', so the
+    memory tier budget covers it (call DiskCubeCache.resize afterwards)
+
+    Returns:
+        The kept result (an earlier one if another thread attached it first)
+    """
+    kept = cube.setdefault(kind, {}).setdefault(key, result)
+    if kept is result:
+        sizes = cube.setdefault('result_nbytes', {})
+        sizes[kind] = sizes.get(kind, 0) + object_nbytes(key) + object_nbytes(result)
+    return kept
+
+
+def clear_results(cube: Dict, kind: str):
+    """Drop every result of one kind kept with a cube"""
+    cube.get(kind, {}).clear()
+    cube.get('result_nbytes', {}).pop(kind, None)
+
+
+def cube_nbytes(cube: Dict) -> int:
+    """
+    Number of bytes held by a cube, including its LOD pyramid levels and the
+    results attached to it (see attach_result)
+    """
+    total = sum(arr.nbytes for arr in cube['variables'].values())
+    total += sum(arr.nbytes for arr in cube.get('derived', {}).values())
+    total += cube['latitude'].nbytes + cube['longitude'].nbytes
+    if 'depth' in cube:
+        total += cube['depth'].nbytes
+    for level in cube.get('pyramid', [])[1:]:
+        total += cube_nbytes(level)
+    total += sum(cube.get('result_nbytes', {}).values())
+    return total
+
+
+class DiskCubeCache:
+    """
+    TTL-expiring cube cache backed by a shared directory
+
+    Two tiers, both bounded by bytes rather than entry count: decoded cubes
+    in this worker's memory (OCEAN_MEMORY_CACHE_BYTES, LRU) and compressed
+    files on disk (OCEAN_CACHE_MAX_BYTES, oldest first).
+
+    Entries older than ttl are stale: plain lookups miss them, but they stay
+    readable with get(key, stale=True) for another stale_ttl seconds
+    (OCEAN_CACHE_STALE_SECONDS) before they are dropped.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: int = 3600,
+                 max_bytes: Optional[int] = None, memory_max_bytes: Optional[int] = None,
+                 stale_ttl: Optional[int] = None):
+        self.cache_dir = cache_dir or os.environ.get('OCEAN_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl if stale_ttl is not None else int(
+            os.environ.get('OCEAN_CACHE_STALE_SECONDS', DEFAULT_STALE_SECONDS)
+        )
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.environ.get('OCEAN_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+        )
+        self.memory_max_bytes = memory_max_bytes if memory_max_bytes is not None else int(
+            os.environ.get('OCEAN_MEMORY_CACHE_BYTES', DEFAULT_MEMORY_BYTES)
+        )
+        self._memory = OrderedDict()  # key -> (fetched_at, cube, nbytes)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'memory_hits': 0, 'disk_hits': 0, 'stale_hits': 0, 'misses': 0, 'expired': 0,
+            'memory_evictions': 0, 'disk_evictions': 0, 'puts': 0
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _count(self, name: str, record: bool = True):
+        if record:
+            with self._lock:
+                self.stats[name] += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key: str, record: bool = True, stale: bool = False) -> Optional[Dict]:
+        """
+        Return the cached cube for key, or None if missing or expired
+
+        With stale=True, expired cubes still inside the stale window are
+        returned as well (check them with is_stale). Pass record=False for
+        internal re-checks that should not count as lookups.
+        """
+        now = time.time()
+        max_age = self.ttl + self.stale_ttl if stale else self.ttl
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                fetched_at, cube, nbytes = entry
+                age = now - fetched_at
+                if age < max_age:
+                    self._memory.move_to_end(key)
+                    if record:
+                        self.stats['memory_hits' if age < self.ttl else 'stale_hits'] += 1
+                    return cube
+                if age >= self.ttl + self.stale_ttl:
+                    del self._memory[key]
+                    self._memory_bytes -= nbytes
+                self.stats['expired'] += 1
+
+        path = self._path(key)
+        try:
+            fetched_at = os.path.getmtime(path)
+        except OSError:
+            self._count('misses', record)
+            return None
+
+        age = now - fetched_at
+        if age >= max_age:
+            if age >= self.ttl + self.stale_ttl:
+                self._remove(path)
+            if entry is None:
+                self._count('expired')
+            self._count('misses', record)
+            return None
+
+        try:
+            cube = self._read(path)
+        except Exception as e:
+            # Partially written or corrupt file from another worker
+            logger.warning(f"Discarding unreadable cache entry {key}: {str(e)}")
+            self._remove(path)
+            self._count('misses', record)
+            return None
+
+        cube['key'] = key
+        self._remember(key, fetched_at, cube)
+        self._count('disk_hits' if age < self.ttl else 'stale_hits', record)
+        return cube
+
+    def is_stale(self, cube: Dict) -> bool:
+        """Whether a cube returned by get(stale=True) is past its TTL"""
+        return 'fetched_at' in cube and time.time() - cube['fetched_at'] >= self.ttl
+
+    def put(self, key: str, cube: Dict):
+        """Store a cube in memory and on disk, then enforce the byte budget"""
+        now = time.time()
+        cube['key'] = key
+        self._remember(key, now, cube)
+        self._count('puts')
+
+        try:
+            self._write(self._path(key), cube)
+            self._evict()
+        except OSError as e:
+            logger.warning(f"Could not persist cache entry {key}: {str(e)}")
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npz'):
+                self._remove(os.path.join(self.cache_dir, name))
+
+    def _remember(self, key: str, fetched_at: float, cube: Dict):
+        cube['fetched_at'] = fetched_at
+        nbytes = cube_nbytes(cube)
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old[2]
+            if nbytes > self.memory_max_bytes:
+                # Larger than the whole budget: serve it from disk only
+                return
+            self._memory[key] = (fetched_at, cube, nbytes)
+            self._memory_bytes += nbytes
+            self._trim_memory()
+
+    def _trim_memory(self):
+        """Evict least recently used cubes until under the memory budget (lock held)"""
+        while self._memory_bytes > self.memory_max_bytes and self._memory:
+            _, (_, _, nbytes) = self._memory.popitem(last=False)
+            self._memory_bytes -= nbytes
+            self.stats['memory_evictions'] += 1
+
+    def resize(self, key: str):
+        """Re-account an entry whose cube grew (e.g. a pyramid or a result was attached)"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return
+            fetched_at, cube, old_nbytes = entry
+            nbytes = cube_nbytes(cube)
+            self._memory[key] = (fetched_at, cube, nbytes)
+            self._memory_bytes += nbytes - old_nbytes
+            self._trim_memory()
+
+    def _write(self, path: str, cube: Dict):
+        arrays = {
+            f"{VAR_PREFIX}{name}": np.asarray(values, dtype=np.float32)
+            for name, values in cube['variables'].items()
+        }
+        arrays.update({
+            f"{DERIVED_PREFIX}{name}": np.asarray(values, dtype=np.float32)
+            for name, values in cube.get('derived', {}).items()
+        })
+        arrays['latitude'] = cube['latitude']
+        arrays['longitude'] = cube['longitude']
+        arrays['time'] = np.asarray(cube['time'], dtype=str)
+        if 'depth' in cube:
+            arrays['depth'] = cube['depth']
+
+        # Write to a temp file and rename so other workers never see partial data
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+    def _read(self, path: str) -> Dict:
+        with np.load(path, allow_pickle=False) as npz:
+            variables = {
+                name[len(VAR_PREFIX):]: npz[name]
+                for name in npz.files if name.startswith(VAR_PREFIX)
+            }
+            cube = {
+                'variables': variables,
+                'latitude': npz['latitude'],
+                'longitude': npz['longitude'],
+                'time': npz['time'].tolist()
+            }
+            if 'depth' in npz.files:
+                cube['depth'] = npz['depth']
+            derived = {
+                name[len(DERIVED_PREFIX):]: npz[name]
+                for name in npz.files if name.startswith(DERIVED_PREFIX)
+            }
+            if derived:
+                cube['derived'] = derived
+            return cube
+
+    def _evict(self):
+        """Remove entries past the stale window, then the oldest ones until under budget"""
+        now = time.time()
+        entries = []
+        total = 0
+
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.npz'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime >= self.ttl + self.stale_ttl:
+                self._remove(path)
+                self._count('expired')
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            self._count('disk_evictions')
+            total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def disk_usage(self) -> Tuple[int, int]:
+        """Return (entry count, total bytes) currently on disk"""
+        count = 0
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npz'):
+                try:
+                    total += os.path.getsize(os.path.join(self.cache_dir, name))
+                    count += 1
+                except OSError:
+                    continue
+        return count, total
+
+    def snapshot(self) -> Dict:
+        """Hit/miss/eviction counters and resident sizes"""
+        disk_entries, disk_bytes = self.disk_usage()
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_bytes'] = self._memory_bytes
+        hits = stats['memory_hits'] + stats['disk_hits'] + stats['stale_hits']
+        lookups = hits + stats['misses']
+        stats['hit_ratio'] = hits / lookups if lookups else None
+        stats['memory_max_bytes'] = self.memory_max_bytes
+        stats['disk_entries'] = disk_entries
+        stats['disk_bytes'] = disk_bytes
+        stats['disk_max_bytes'] = self.max_bytes
+        stats['ttl'] = self.ttl
+        stats['stale_ttl'] = self.stale_ttl
+        return stats
+
+
+class _Flight:
+    """One in-progress call shared by every caller asking for the same key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for that result (or exception) instead of issuing
+    their own upstream request.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'executed': 0, 'coalesced': 0, 'errors': 0}
+
+    def do(self, key: str, fn: Callable):
+        with self._lock:
+            self.stats['calls'] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.stats['executed'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def in_flight(self) -> int:
+        """Number of keys currently being fetched"""
+        with self._lock:
+            return len(self._flights)
+
+    def snapshot(self) -> Dict:
+        """Counters plus the current in-flight count"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self._flights)
+        stats['upstream_calls_saved'] = stats['coalesced']
+        return stats
+
+
+class FailureCache:
+    """
+    Short-lived memory of failed fetches (negative caching)
+
+    While a failure is remembered, callers fail fast with the same error
+    instead of each sending another upstream request that is likely to time
+    out or fail the same way.
+    """
+
+    def __init__(self, ttl: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else int(
+            os.environ.get('OCEAN_FAILURE_CACHE_SECONDS', DEFAULT_FAILURE_SECONDS)
+        )
+        self._failures = {}  # key -> (failed_at, message)
+        self._lock = threading.Lock()
+        self.stats = {'recorded': 0, 'hits': 0}
+
+    def add(self, key: str, error: Exception):
+        with self._lock:
+            self._failures[key] = (time.time(), str(error))
+            self.stats['recorded'] += 1
+
+    def discard(self, key: str):
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def get(self, key: str, record: bool = True) -> Optional[Tuple[str, float]]:
+        """(error message, seconds until retry) while the failure is remembered, else None"""
+        now = time.time()
+        with self._lock:
+            entry = self._failures.get(key)
+            if entry is None:
+                return None
+            failed_at, message = entry
+            if now - failed_at >= self.ttl:
+                del self._failures[key]
+                return None
+            if record:
+                self.stats['hits'] += 1
+            return message, self.ttl - (now - failed_at)
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = sum(1 for failed_at, _ in self._failures.values() if now - failed_at < self.ttl)
+        stats['ttl'] = self.ttl
+        return stats
+
+
+class Revalidator:
+    """
+    Background refreshes of stale cubes, at most one queued or running per key
+
+    Requests that find a stale cube return it straight away and hand the
+    refresh to this small pool, so a slow upstream never holds a request
+    thread.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ocean-revalidate')
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'refreshed': 0, 'failed': 0}
+
+    def submit(self, key: str, fn: Callable) -> bool:
+        """Schedule fn unless a refresh of key is already pending; returns whether it was scheduled"""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            self.stats['submitted'] += 1
+        self._pool.submit(self._run, key, fn)
+        return True
+
+    def _run(self, key: str, fn: Callable):
+        try:
+            fn()
+            outcome = 'refreshed'
+        except Exception as e:
+            logger.warning(f"Background refresh of {key} failed: {str(e)}")
+            outcome = 'failed'
+        with self._lock:
+            self._pending.discard(key)
+            self.stats[outcome] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._pending)
+        return stats
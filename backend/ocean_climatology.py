@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Ocean Climatology
+Per-cell, per-calendar-day mean and variance of one variable, kept with
+Welford's incremental accumulators.
+
+Each ingested day updates the accumulators for its calendar day in one
+vectorized pass; the history is never re-read. The state is three float32
+arrays of shape (366, lat, lon) stored as .npy files and memory-mapped by the
+API, so an anomaly is one subtraction against a view of the mean:
+
+    <directory>/<variable>.count.npy    samples per cell and day
+    <directory>/<variable>.mean.npy     running mean
+    <directory>/<variable>.m2.npy       running sum of squared deviations
+    <directory>/<variable>.grid.npz     latitude/longitude of the cells
+    <directory>/<variable>.days.npy     which dates have been counted, per year
+
+Calendar days follow a leap-year calendar, so 1 March is always the same
+slot and 29 February has its own.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from ocean_archive import atomic_save
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_SLOTS = 366
+
+
+def calendar_slot(date: datetime) -> int:
+    """Day-of-year index on a leap-year calendar (0-365)"""
+    return datetime(2000, date.month, date.day).timetuple().tm_yday - 1
+
+
+class Climatology:
+    """Memory-mapped Welford climatology of one variable"""
+
+    def __init__(self, directory: str, variable: str):
+        self.directory = directory
+        self.variable = variable
+        self._mapped = None  # (mtime, count, mean, m2, latitude, longitude)
+        self._lock = threading.Lock()
+
+    def _path(self, part: str) -> str:
+        return os.path.join(self.directory, f"{self.variable}.{part}")
+
+    def _load(self, mmap_mode: Optional[str] = 'r'):
+        """Current arrays, re-mapped when the ingestion job replaced the files"""
+        try:
+            mtime = os.path.getmtime(self._path('mean.npy'))
+        except OSError:
+            return None
+
+        with self._lock:
+            if self._mapped is None or self._mapped[0] != mtime or mmap_mode is None:
+                with np.load(self._path('grid.npz')) as grid:
+                    latitude, longitude = grid['latitude'], grid['longitude']
+                arrays = [np.load(self._path(f'{part}.npy'), mmap_mode=mmap_mode)
+                          for part in ('count', 'mean', 'm2')]
+                mapped = (mtime, *arrays, latitude, longitude)
+                if mmap_mode is None:
+                    return mapped
+                self._mapped = mapped
+            return self._mapped
+
+    def add_days(self, cubes: Dict[str, Dict]) -> int:
+        """
+        Fold days (date -> cube) into the accumulators
+
+        Dates that were counted before are skipped, so re-ingesting a day does
+        not weight it twice. Returns the number of days added.
+        """
+        if not cubes:
+            return 0
+
+        state = self._load(mmap_mode=None)
+        if state is None:
+            first = next(iter(cubes.values()))
+            shape = (CALENDAR_SLOTS, len(first['latitude']), len(first['longitude']))
+            count, mean, m2 = (np.zeros(shape, dtype=np.float32) for _ in range(3))
+            latitude, longitude = first['latitude'], first['longitude']
+        else:
+            _, count, mean, m2, latitude, longitude = state
+
+        counted = {}
+        added = 0
+        for date_str, cube in sorted(cubes.items()):
+            date = datetime.strptime(date_str, '%Y-%m-%d')
+            if date.year not in counted:
+                path = self._path(f'{date.year}.days.npy')
+                counted[date.year] = np.load(path) if os.path.exists(path) else np.zeros(366, dtype=bool)
+            day_index = date.timetuple().tm_yday - 1
+            if counted[date.year][day_index]:
+                continue
+            if not (np.array_equal(cube['latitude'], latitude) and np.array_equal(cube['longitude'], longitude)):
+                raise ValueError(f"{self.variable} for {date_str} is not on the climatology grid")
+
+            # First time step / depth level, as a (lat, lon) field
+            values = cube['variables'][self.variable]
+            x = values.reshape((-1,) + values.shape[-2:])[0]
+            valid = ~np.isnan(x)
+
+            slot = calendar_slot(date)
+            n = count[slot] + valid
+            delta = np.where(valid, x - mean[slot], 0.0)
+            mean[slot] += np.where(valid, delta / np.maximum(n, 1), 0.0)
+            m2[slot] += np.where(valid, delta * (np.nan_to_num(x) - mean[slot]), 0.0)
+            count[slot] = n
+
+            counted[date.year][day_index] = True
+            added += 1
+
+        if added:
+            # Grid first and mean last: readers re-map when mean.npy changes
+            atomic_save(self._path('grid.npz'),
+                        lambda f: np.savez(f, latitude=latitude, longitude=longitude))
+            for part, array in (('count', count), ('m2', m2), ('mean', mean)):
+                atomic_save(self._path(f'{part}.npy'), lambda f: np.save(f, array))
+            for year, flags in counted.items():
+                atomic_save(self._path(f'{year}.days.npy'), lambda f: np.save(f, flags))
+        return added
+
+    def clear(self):
+        """Remove the accumulators (before a rebuild from the archive)"""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.startswith(self.variable + '.'):
+                os.remove(os.path.join(self.directory, name))
+        with self._lock:
+            self._mapped = None
+
+    def day(self, date: datetime) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Climatology for a calendar day
+
+        Returns:
+            (mean, std, count) float32 (lat, lon) arrays, NaN where the cell has
+            no samples (std needs two), or None if nothing has been ingested
+        """
+        state = self._load()
+        if state is None:
+            return None
+        _, count, mean, m2, _, _ = state
+        slot = calendar_slot(date)
+        n = count[slot]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            day_mean = np.where(n > 0, mean[slot], np.nan).astype(np.float32)
+            day_std = np.where(n > 1, np.sqrt(m2[slot] / (n - 1)), np.nan).astype(np.float32)
+        return day_mean, day_std, n
+
+    def grid(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(latitude, longitude) of the climatology cells"""
+        state = self._load()
+        return None if state is None else (state[4], state[5])
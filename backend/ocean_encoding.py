@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Ocean Data Binary Encoding
+Compact binary container for NumPy grids served by the Copernicus API.
+
+Layout (all integers little-endian):
+    bytes 0-3   magic b'NARA'
+    bytes 4-7   uint32 length N of the JSON header
+    next N      UTF-8 JSON header, space padded so the data section is 8-byte aligned
+    rest        raw array buffers in C order, each starting on an 8-byte boundary
+
+The header holds an 'arrays' map of name -> {dtype, shape, offset, nbytes}, where
+offset is relative to the start of the data section, 'data_nbytes' (the length of
+the data section, so payloads can be concatenated into a stream of frames) plus any
+caller fields.
+In JavaScript a float32 grid is simply new Float32Array(buffer, dataStart + offset, count).
+
+With the optional int16 encoding each data grid is sent as int16 plus a
+'<name>.mask' validity bitmask (np.packbits order: most significant bit first,
+1 = valid cell), and header['encoding'][name] gives 'scale' and 'offset' so
+value = offset + scale * q. This is about half the size of float32 and keeps
+land/missing cells distinct from real zero values.
+"""
+
+import json
+import struct
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+MAGIC = b'NARA'
+FORMAT_VERSION = 1
+BINARY_MIMETYPE = 'application/octet-stream'
+ALIGNMENT = 8
+
+ENCODINGS = ('float32', 'int16')
+INT16_LIMIT = 32767
+
+
+def _padding(length: int) -> int:
+    return (-length) % ALIGNMENT
+
+
+def wants_binary(req) -> bool:
+    """True when the client asked for the binary format (?format=bin or Accept header)"""
+    fmt = req.args.get('format', '').lower()
+    if fmt:
+        return fmt in ('bin', 'binary')
+    best = req.accept_mimetypes.best_match(['application/json', BINARY_MIMETYPE])
+    return best == BINARY_MIMETYPE
+
+
+def parse_encoding(args) -> str:
+    """Read ?encoding= (float32 or int16); raises ValueError when unknown"""
+    encoding = args.get('encoding', 'float32').lower()
+    if encoding not in ENCODINGS:
+        raise ValueError(f"encoding must be one of: {', '.join(ENCODINGS)}")
+    return encoding
+
+
+def quantize_int16(values: np.ndarray) -> Tuple[np.ndarray, float, float, np.ndarray]:
+    """
+    Pack a float grid as int16 with a linear scale/offset fitted to its valid range
+
+    Returns:
+        (int16 array, scale, offset, boolean validity mask)
+    """
+    values = np.asarray(values, dtype=np.float32)
+    valid = ~np.isnan(values)
+
+    if valid.any():
+        low = float(np.min(values, where=valid, initial=np.inf))
+        high = float(np.max(values, where=valid, initial=-np.inf))
+    else:
+        low = high = 0.0
+
+    offset = (low + high) / 2
+    scale = (high - low) / (2 * INT16_LIMIT) or 1.0
+
+    scaled = np.rint((np.where(valid, values, offset) - offset) / scale)
+    quantized = np.clip(scaled, -INT16_LIMIT, INT16_LIMIT).astype(np.int16)
+    return quantized, scale, offset, valid
+
+
+def pack_values(arrays: Dict[str, np.ndarray], encoding: str = 'float32') -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    Apply a value encoding to data grids before encode_arrays
+
+    Returns:
+        (arrays to encode, header['encoding'] entries)
+    """
+    if encoding == 'float32':
+        return arrays, {}
+
+    packed = {}
+    spec = {}
+    for name, values in arrays.items():
+        quantized, scale, offset, valid = quantize_int16(values)
+        packed[name] = quantized
+        mask_name = None
+        if not valid.all():
+            mask_name = f'{name}.mask'
+            packed[mask_name] = np.packbits(valid.ravel())
+        spec[name] = {'type': 'int16', 'scale': scale, 'offset': offset, 'mask': mask_name}
+    return packed, spec
+
+
+def encode_arrays(arrays: Dict[str, np.ndarray], header: Dict = None) -> bytes:
+    """
+    Pack named arrays and a JSON-serializable header into one binary payload
+
+    Args:
+        arrays: Ordered mapping of name -> NumPy array (any numeric dtype)
+        header: Extra header fields (metadata, time axis, stats, ...)
+
+    Returns:
+        Encoded payload bytes
+    """
+    buffers = []
+    layout = {}
+    offset = 0
+
+    for name, arr in arrays.items():
+        arr = np.asarray(arr)
+        little = arr.dtype.newbyteorder('<')
+        raw = np.ascontiguousarray(arr, dtype=little).tobytes()
+        layout[name] = {
+            'dtype': little.str,
+            'shape': list(arr.shape),
+            'offset': offset,
+            'nbytes': len(raw)
+        }
+        pad = _padding(len(raw))
+        buffers.append(raw)
+        if pad:
+            buffers.append(b'\0' * pad)
+        offset += len(raw) + pad
+
+    full_header = dict(header or {})
+    full_header['version'] = FORMAT_VERSION
+    full_header['arrays'] = layout
+    full_header['data_nbytes'] = offset
+
+    header_bytes = json.dumps(full_header, separators=(',', ':')).encode('utf-8')
+    header_bytes += b' ' * _padding(len(MAGIC) + 4 + len(header_bytes))
+
+    return b''.join([MAGIC, struct.pack('<I', len(header_bytes)), header_bytes] + buffers)
+
+
+def decode_arrays(payload: bytes, start: int = 0) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """
+    Inverse of encode_arrays, used by Python clients and the benchmarks
+
+    Args:
+        payload: Encoded bytes
+        start: Byte offset of the frame within payload
+
+    Returns:
+        (header dict, mapping of name -> read-only NumPy array view)
+    """
+    if payload[start:start + 4] != MAGIC:
+        raise ValueError('Not a NARA binary ocean payload')
+
+    (header_len,) = struct.unpack_from('<I', payload, start + 4)
+    data_start = start + 8 + header_len
+    header = json.loads(payload[start + 8:data_start].decode('utf-8'))
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = spec['nbytes'] // dtype.itemsize if dtype.itemsize else 0
+        arrays[name] = np.frombuffer(
+            payload, dtype=dtype, count=count, offset=data_start + spec['offset']
+        ).reshape(spec['shape'])
+
+    return header, arrays
+
+
+def iter_frames(payload: bytes) -> Iterator[Tuple[Dict, Dict[str, np.ndarray]]]:
+    """Decode a stream of concatenated frames (e.g. a historical range)"""
+    pos = 0
+    while pos < len(payload):
+        header, arrays = decode_arrays(payload, pos)
+        (header_len,) = struct.unpack_from('<I', payload, pos + 4)
+        pos += 8 + header_len + header['data_nbytes']
+        yield header, arrays
+
+
+def unpack_values(header: Dict, arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Reconstruct float32 grids (NaN where missing) from a decoded payload"""
+    spec = header.get('encoding', {})
+    values = {}
+    for name, arr in arrays.items():
+        if name.endswith('.mask'):
+            continue
+        if name not in spec:
+            values[name] = arr
+            continue
+        info = spec[name]
+        restored = (info['offset'] + info['scale'] * arr.astype(np.float64)).astype(np.float32)
+        if info['mask']:
+            valid = np.unpackbits(arrays[info['mask']], count=arr.size).astype(bool).reshape(arr.shape)
+            restored[~valid] = np.nan
+        values[name] = restored
+    return values
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Thermal Front Detection
+Potential fishing zone (PFZ) candidates from SST gradients on the regular
+Copernicus grid.
+
+Fronts are cells where the Sobel gradient magnitude of SST exceeds a
+threshold (°C/km). Neighbouring front cells (8-connected) are grouped into
+regions, small regions are dropped, and each region becomes a GeoJSON
+feature. Everything is vectorized NumPy (no SciPy/image libraries): the Sobel
+kernels are shifted slices and labelling propagates the minimum label between
+neighbours until it settles.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ocean_grid import axis_spec
+
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON = 111.320
+
+# 8-connected neighbour offsets
+NEIGHBOURS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)]
+
+
+def sobel_gradient(sst: np.ndarray, latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """
+    SST gradient magnitude (°C/km) of a 2-D (latitude, longitude) grid
+
+    Cells next to land or the grid edge whose 3x3 window has missing values
+    get NaN, so coastlines are not mistaken for fronts.
+    """
+    z = np.pad(sst.astype(np.float64), 1, constant_values=np.nan)
+    _, lat_step = axis_spec(latitude)
+    _, lon_step = axis_spec(longitude)
+    dy_km = abs(lat_step) * KM_PER_DEGREE_LAT
+    dx_km = abs(lon_step) * KM_PER_DEGREE_LON * np.cos(np.radians(latitude))[:, None]
+
+    def window(di, dj):
+        return z[1 + di:z.shape[0] - 1 + di, 1 + dj:z.shape[1] - 1 + dj]
+
+    gx = ((window(-1, 1) + 2 * window(0, 1) + window(1, 1)) -
+          (window(-1, -1) + 2 * window(0, -1) + window(1, -1))) / (8 * dx_km)
+    gy = ((window(1, -1) + 2 * window(1, 0) + window(1, 1)) -
+          (window(-1, -1) + 2 * window(-1, 0) + window(-1, 1))) / (8 * dy_km)
+
+    # Orientation of latitude does not matter for the magnitude
+    return np.hypot(gx, gy)
+
+
+def label_regions(mask: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Label 8-connected regions of a boolean mask
+
+    Returns:
+        (labels, n_regions) with labels 1..n_regions and 0 outside the mask
+    """
+    rows, cols = mask.shape
+    big = rows * cols + 1
+    labels = np.where(mask, np.arange(1, big).reshape(rows, cols), big)
+
+    while True:
+        padded = np.pad(labels, 1, constant_values=big)
+        smallest = labels
+        for di, dj in NEIGHBOURS:
+            smallest = np.minimum(smallest, padded[1 + di:rows + 1 + di, 1 + dj:cols + 1 + dj])
+        smallest = np.where(mask, smallest, big)
+        if np.array_equal(smallest, labels):
+            break
+        labels = smallest
+
+    # Renumber the surviving minimum labels as 1..n
+    unique, inverse = np.unique(np.where(mask, labels, 0), return_inverse=True)
+    labels = inverse.reshape(rows, cols)
+    if unique[0] != 0:
+        labels = labels + 1
+    return labels, len(unique) - (1 if unique[0] == 0 else 0)
+
+
+def _region_polygons(cells: np.ndarray, latitude: np.ndarray, longitude: np.ndarray) -> List:
+    """MultiPolygon coordinates covering a region: one rectangle per run of cells in a row"""
+    _, lat_step = axis_spec(latitude)
+    _, lon_step = axis_spec(longitude)
+    half_lat, half_lon = abs(lat_step) / 2, abs(lon_step) / 2
+
+    polygons = []
+    for i in np.unique(cells[:, 0]):
+        js = np.sort(cells[cells[:, 0] == i, 1])
+        breaks = np.flatnonzero(np.diff(js) > 1)
+        for start, stop in zip(np.r_[js[0], js[breaks + 1]], np.r_[js[breaks], js[-1]]):
+            south, north = latitude[i] - half_lat, latitude[i] + half_lat
+            west, east = longitude[start] - half_lon, longitude[stop] + half_lon
+            polygons.append([[
+                [round(float(west), 4), round(float(south), 4)],
+                [round(float(east), 4), round(float(south), 4)],
+                [round(float(east), 4), round(float(north), 4)],
+                [round(float(west), 4), round(float(north), 4)],
+                [round(float(west), 4), round(float(south), 4)]
+            ]])
+    return polygons
+
+
+def detect_fronts(sst: np.ndarray, latitude: np.ndarray, longitude: np.ndarray,
+                  threshold: float = 0.03, min_cells: int = 3) -> Dict:
+    """
+    Thermal front regions of an SST grid as a GeoJSON FeatureCollection
+
+    Args:
+        sst: 2-D (latitude, longitude) SST grid in °C, NaN over land
+        threshold: Minimum gradient magnitude in °C/km
+        min_cells: Regions with fewer cells are dropped
+
+    Returns:
+        FeatureCollection, one MultiPolygon feature per region with its size,
+        gradient and SST statistics, strongest fronts first
+    """
+    gradient = sobel_gradient(sst, latitude, longitude)
+    with np.errstate(invalid='ignore'):
+        mask = gradient >= threshold
+    labels, n_regions = label_regions(mask)
+
+    sizes = np.bincount(labels.ravel(), minlength=n_regions + 1)
+    _, lat_step = axis_spec(latitude)
+    _, lon_step = axis_spec(longitude)
+    cell_km2 = (abs(lat_step) * KM_PER_DEGREE_LAT * abs(lon_step) * KM_PER_DEGREE_LON *
+                np.cos(np.radians(latitude)))[:, None] * np.ones_like(sst, dtype=np.float64)
+
+    features = []
+    for region in np.flatnonzero(sizes[1:] >= min_cells) + 1:
+        cells = np.argwhere(labels == region)
+        inside = labels == region
+        features.append({
+            'type': 'Feature',
+            'geometry': {
+                'type': 'MultiPolygon',
+                'coordinates': _region_polygons(cells, latitude, longitude)
+            },
+            'properties': {
+                'cells': int(sizes[region]),
+                'area_km2': round(float(cell_km2[inside].sum()), 1),
+                'mean_gradient': round(float(gradient[inside].mean()), 4),
+                'max_gradient': round(float(gradient[inside].max()), 4),
+                'mean_sst': round(float(np.nanmean(sst[inside])), 2),
+                'centroid': [round(float(longitude[cells[:, 1]].mean()), 4),
+                             round(float(latitude[cells[:, 0]].mean()), 4)]
+            }
+        })
+
+    features.sort(key=lambda f: f['properties']['max_gradient'], reverse=True)
+    for n, feature in enumerate(features, start=1):
+        feature['id'] = n
+        feature['properties']['id'] = n
+
+    return {'type': 'FeatureCollection', 'features': features}
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Ocean Grid Indexing
+Index arithmetic on the regular 0.083° Copernicus latitude/longitude grids.
+
+The cubes are regular, so positions map to array indices directly
+((value - origin) / step) instead of searching the coordinate arrays.
+All functions work on many points at once and broadcast over the leading
+(time, depth) axes of a cube variable.
+"""
+
+import warnings
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def axis_spec(axis: np.ndarray) -> Tuple[float, float]:
+    """Return (origin, step) of a regular 1-D coordinate axis"""
+    if len(axis) < 2:
+        return float(axis[0]), 1.0
+    return float(axis[0]), float(axis[-1] - axis[0]) / (len(axis) - 1)
+
+
+def fractional_index(axis: np.ndarray, values) -> np.ndarray:
+    """Fractional array position of each value along a regular axis"""
+    origin, step = axis_spec(axis)
+    return (np.asarray(values, dtype=np.float64) - origin) / step
+
+
+def nearest_index(axis: np.ndarray, values) -> np.ndarray:
+    """Index of the nearest grid cell for each value (clipped to the axis)"""
+    idx = np.rint(fractional_index(axis, values)).astype(np.intp)
+    return np.clip(idx, 0, len(axis) - 1)
+
+
+def sample_nearest(grid: np.ndarray, latitude: np.ndarray, longitude: np.ndarray,
+                   lats, lons) -> np.ndarray:
+    """
+    Nearest-cell values at the given points
+
+    Args:
+        grid: Array whose last two axes are (latitude, longitude)
+        latitude, longitude: The grid's coordinate axes
+        lats, lons: Point coordinates (same length)
+
+    Returns:
+        Array of shape grid.shape[:-2] + (n_points,)
+    """
+    i = nearest_index(latitude, lats)
+    j = nearest_index(longitude, lons)
+    return grid[..., i, j]
+
+
+def sample_bilinear(grid: np.ndarray, latitude: np.ndarray, longitude: np.ndarray,
+                    lats, lons) -> np.ndarray:
+    """
+    Bilinearly interpolated values at the given points
+
+    Missing (NaN) corners are dropped and the remaining weights renormalized,
+    so coastal points next to land cells still get a value.
+
+    Returns:
+        Array of shape grid.shape[:-2] + (n_points,)
+    """
+    fi = np.clip(fractional_index(latitude, lats), 0, len(latitude) - 1)
+    fj = np.clip(fractional_index(longitude, lons), 0, len(longitude) - 1)
+
+    i0 = np.minimum(np.floor(fi).astype(np.intp), max(len(latitude) - 2, 0))
+    j0 = np.minimum(np.floor(fj).astype(np.intp), max(len(longitude) - 2, 0))
+    i1 = np.minimum(i0 + 1, len(latitude) - 1)
+    j1 = np.minimum(j0 + 1, len(longitude) - 1)
+    di = fi - i0
+    dj = fj - j0
+
+    corners = np.stack([grid[..., i0, j0], grid[..., i0, j1],
+                        grid[..., i1, j0], grid[..., i1, j1]])
+    weights = np.stack([(1 - di) * (1 - dj), (1 - di) * dj,
+                        di * (1 - dj), di * dj])
+    weights = np.broadcast_to(weights.reshape((4,) + (1,) * (corners.ndim - 2) + (-1,)),
+                              corners.shape)
+
+    valid = ~np.isnan(corners)
+    total = np.where(valid, weights, 0.0).sum(axis=0)
+    weighted = np.where(valid, corners * weights, 0.0).sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = weighted / total
+    return np.where(total > 0, result, np.nan)
+
+
+def sample_points(grid: np.ndarray, latitude: np.ndarray, longitude: np.ndarray,
+                  lats, lons, method: str = 'nearest') -> np.ndarray:
+    """Sample a grid at many points with 'nearest' or 'bilinear' interpolation"""
+    if method == 'bilinear':
+        return sample_bilinear(grid, latitude, longitude, lats, lons)
+    if method == 'nearest':
+        return sample_nearest(grid, latitude, longitude, lats, lons)
+    raise ValueError(f"Unknown interpolation method: {method}")
+
+
+def path_distances(lats, lons) -> np.ndarray:
+    """Cumulative great-circle distance (km) along a path of points, starting at 0"""
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    a = (np.sin(np.diff(lat) / 2) ** 2 +
+         np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2)
+    steps = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    return np.concatenate([[0.0], np.cumsum(steps)])
+
+
+def resample_path(lats, lons, spacing_km: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sample points every spacing_km along a polyline, keeping its vertices
+
+    Positions are interpolated linearly in latitude/longitude by distance
+    along each leg, which is close enough to the great circle over the short
+    legs of a regional route.
+
+    Returns:
+        (lats, lons, distance_km, vertex indices into the samples)
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    distances = path_distances(lats, lons)
+    targets = np.union1d(np.arange(0.0, distances[-1], spacing_km), distances)
+    return (np.interp(targets, distances, lats), np.interp(targets, distances, lons),
+            targets, np.searchsorted(targets, distances))
+
+
+def bbox_slices(latitude: np.ndarray, longitude: np.ndarray, bbox: Dict) -> Tuple[slice, slice]:
+    """
+    Index slices of the cells whose centres fall inside a bounding box
+
+    Computed arithmetically from the axis origin and step. A box smaller than
+    one cell still selects the nearest cell.
+    """
+    def axis_slice(axis, low, high):
+        a, b = sorted(fractional_index(axis, [low, high]))
+        start = int(np.clip(np.ceil(a - 1e-6), 0, len(axis) - 1))
+        stop = int(np.clip(np.floor(b + 1e-6) + 1, 0, len(axis)))
+        if stop <= start:
+            start = int(nearest_index(axis, (low + high) / 2))
+            stop = start + 1
+        return slice(start, stop)
+
+    return (axis_slice(latitude, bbox['min_lat'], bbox['max_lat']),
+            axis_slice(longitude, bbox['min_lon'], bbox['max_lon']))
+
+
+def slice_cube(cube: Dict, bbox: Dict) -> Dict:
+    """Sub-region of a cube as array views (no copy, no new fetch)"""
+    lat_slice, lon_slice = bbox_slices(cube['latitude'], cube['longitude'], bbox)
+    sliced = {
+        'variables': {var: values[..., lat_slice, lon_slice] for var, values in cube['variables'].items()},
+        'latitude': cube['latitude'][lat_slice],
+        'longitude': cube['longitude'][lon_slice],
+        'time': cube['time']
+    }
+    if 'depth' in cube:
+        sliced['depth'] = cube['depth']
+    if 'derived' in cube:
+        sliced['derived'] = {name: values[..., lat_slice, lon_slice] for name, values in cube['derived'].items()}
+    return sliced
+
+
+def coarsen_axis(axis: np.ndarray, factor: int) -> np.ndarray:
+    """Block-centre coordinates of a regular axis pooled by factor (stays regular)"""
+    if factor == 1:
+        return axis
+    origin, step = axis_spec(axis)
+    n_blocks = -(-len(axis) // factor)
+    return origin + step * ((factor - 1) / 2 + factor * np.arange(n_blocks))
+
+
+def coarsen(grid: np.ndarray, factor: int, circular: bool = False) -> np.ndarray:
+    """
+    Mean-pool the last two (latitude, longitude) axes by factor
+
+    Edges are padded with NaN, and NaN cells are ignored, so a block is only
+    missing when all of its cells are. Set circular for angles in degrees
+    (wave or current direction), which are averaged as unit vectors.
+    """
+    if factor == 1:
+        return grid
+
+    pad_lat = (-grid.shape[-2]) % factor
+    pad_lon = (-grid.shape[-1]) % factor
+    if pad_lat or pad_lon:
+        pad = [(0, 0)] * (grid.ndim - 2) + [(0, pad_lat), (0, pad_lon)]
+        grid = np.pad(grid, pad, constant_values=np.nan)
+
+    blocks = grid.reshape(grid.shape[:-2] + (grid.shape[-2] // factor, factor,
+                                             grid.shape[-1] // factor, factor))
+
+    with warnings.catch_warnings():
+        # All-NaN blocks (land) are expected and simply stay NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if circular:
+            radians = np.radians(blocks)
+            sin = np.nanmean(np.sin(radians), axis=(-3, -1))
+            cos = np.nanmean(np.cos(radians), axis=(-3, -1))
+            pooled = np.degrees(np.arctan2(sin, cos)) % 360
+        else:
+            pooled = np.nanmean(blocks, axis=(-3, -1))
+
+    return pooled.astype(grid.dtype, copy=False)
+
+
+def build_pyramid(cube: Dict, factors: Sequence[int], circular_vars=()) -> List[Dict]:
+    """
+    Build mean-pooled versions of a cube, one per factor (1 = native)
+
+    Returns:
+        List of cubes in the same order as factors
+    """
+    levels = []
+    for factor in factors:
+        if factor == 1:
+            levels.append(cube)
+            continue
+        levels.append({
+            'variables': {
+                var: coarsen(values, factor, circular=var in circular_vars)
+                for var, values in cube['variables'].items()
+            },
+            'latitude': coarsen_axis(cube['latitude'], factor),
+            'longitude': coarsen_axis(cube['longitude'], factor),
+            'time': cube['time']
+        })
+    return levels
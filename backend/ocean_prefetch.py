@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Ocean Data Prefetch Scheduler
+Background warm-up of the daily Copernicus products for the live endpoints.
+
+Each job fetches today's cube as soon as it is available and refreshes it
+before the cache TTL runs out, so user requests are served from cache. When
+the upstream fails (product not yet published, service down) the job backs
+off exponentially and retries.
+
+Only one process per cache directory runs the jobs (guarded by a lock file);
+the other gunicorn workers read the warmed cubes from the shared disk cache.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process prefetches
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    """Keeps today's cubes warm for a fixed set of datasets"""
+
+    def __init__(self, fetch: Callable, jobs: Dict[str, Dict], ttl: int,
+                 refresh_fraction: float = 0.75, tick: float = 30.0,
+                 base_backoff: float = 60.0, max_backoff: float = 1800.0,
+                 lock_path: Optional[str] = None):
+        """
+        Args:
+            fetch: Callable taking dataset_id, variables, start_date, end_date,
+                   depth and refresh keyword arguments
+            jobs: Mapping of job name -> fetch kwargs (dataset_id, variables, depth)
+            ttl: Cache TTL in seconds; cubes are refreshed after ttl * refresh_fraction
+            tick: Seconds between scheduler passes
+            base_backoff, max_backoff: Retry delay bounds after upstream failures
+            lock_path: Lock file making a single process the prefetch leader
+        """
+        self.fetch = fetch
+        self.jobs = jobs
+        self.ttl = ttl
+        self.refresh_interval = ttl * refresh_fraction
+        self.tick = tick
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lock_path = lock_path
+
+        self._state = {name: self._new_state(None) for name in jobs}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self.is_leader = False
+
+    @staticmethod
+    def _new_state(date_str):
+        return {
+            'date': date_str,
+            'last_success': None,
+            'last_error': None,
+            'failures': 0,
+            'next_run': 0.0
+        }
+
+    def _acquire_leadership(self) -> bool:
+        if fcntl is None or not self.lock_path:
+            return True
+        try:
+            self._lock_file = open(self.lock_path, 'w')
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            if self._lock_file:
+                self._lock_file.close()
+                self._lock_file = None
+            return False
+
+    def start(self):
+        """Start the background thread (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='ocean-prefetch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and release the leader lock"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+        self.is_leader = False
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.is_leader:
+                self.is_leader = self._acquire_leadership()
+            if self.is_leader:
+                try:
+                    self.run_once()
+                except Exception as e:
+                    logger.error(f"Prefetch pass failed: {str(e)}")
+            self._stop.wait(self.tick)
+
+    def run_once(self, now: Optional[float] = None):
+        """Run every job that is due (first fetch of the day, refresh or retry)"""
+        now = time.time() if now is None else now
+        today = datetime.fromtimestamp(now).strftime('%Y-%m-%d')
+
+        for name, job in self.jobs.items():
+            with self._lock:
+                state = self._state[name]
+                if state['date'] != today:
+                    state = self._state[name] = self._new_state(today)
+                if now < state['next_run']:
+                    continue
+
+            started = time.time()
+            try:
+                self.fetch(start_date=today, end_date=today, refresh=True, **job)
+            except Exception as e:
+                with self._lock:
+                    state['failures'] += 1
+                    state['last_error'] = str(e)
+                    delay = min(self.max_backoff, self.base_backoff * 2 ** (state['failures'] - 1))
+                    state['next_run'] = now + delay
+                logger.warning(f"Prefetch of {name} for {today} failed, retrying in {delay:.0f}s: {str(e)}")
+                continue
+
+            with self._lock:
+                state['failures'] = 0
+                state['last_error'] = None
+                state['last_success'] = now
+                state['next_run'] = now + self.refresh_interval
+            logger.info(f"Prefetched {name} for {today} in {time.time() - started:.1f}s")
+
+    def status(self) -> Dict:
+        """Scheduler state for the health endpoint"""
+        def iso(ts):
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+        with self._lock:
+            jobs = {
+                name: {
+                    'date': state['date'],
+                    'last_success': iso(state['last_success']),
+                    'last_error': state['last_error'],
+                    'failures': state['failures'],
+                    'next_run': iso(state['next_run'])
+                }
+                for name, state in self._state.items()
+            }
+
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'leader': self.is_leader,
+            'pid': os.getpid(),
+            'refresh_interval': self.refresh_interval,
+            'jobs': jobs
+        }
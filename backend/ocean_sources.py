@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Ocean Data Sources
+Pluggable upstreams for the Copernicus API cube fetches.
+
+Every source implements open_dataset() with the same keyword arguments as
+copernicusmarine.open_dataset and returns an xarray Dataset, so the API code
+does not care where the data comes from:
+
+- CopernicusSource: the live Copernicus Marine Service (needs credentials)
+- LocalSource: NetCDF (.nc) or Zarr (.zarr) cubes on disk, named after the
+  dataset id, with deterministic synthetic data for datasets that have no
+  file. Used for offline development and load testing.
+
+Select with OCEAN_DATA_SOURCE=copernicus|local and OCEAN_LOCAL_DATA_DIR.
+"""
+
+import abc
+import logging
+import os
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+try:
+    import copernicusmarine
+except ImportError:  # Only needed for the live source
+    copernicusmarine = None
+
+logger = logging.getLogger(__name__)
+
+# Depth levels (m) of the Copernicus global physics analysis down to ~1000 m
+MODEL_DEPTHS = np.array([
+    0.494, 1.541, 2.646, 3.819, 5.078, 6.441, 7.930, 9.573, 11.405, 13.467,
+    15.810, 18.496, 21.599, 25.211, 29.445, 34.434, 40.344, 47.374, 55.764,
+    65.807, 77.854, 92.326, 109.729, 130.666, 155.851, 186.126, 222.475,
+    266.040, 318.127, 380.213, 453.938, 541.089, 643.567, 763.333, 902.339, 1062.440
+])
+
+GRID_STEP = 1.0 / 12.0  # 0.083°
+
+
+class OceanDataSource(abc.ABC):
+    """Interface shared by all data sources"""
+
+    name = 'base'
+
+    @abc.abstractmethod
+    def open_dataset(self, dataset_id: str, variables: Sequence[str],
+                     minimum_longitude: float, maximum_longitude: float,
+                     minimum_latitude: float, maximum_latitude: float,
+                     start_datetime: str, end_datetime: str,
+                     minimum_depth: Optional[float] = None,
+                     maximum_depth: Optional[float] = None) -> xr.Dataset:
+        """Subset of a dataset as an xarray Dataset (lazy or loaded)"""
+
+
+class CopernicusSource(OceanDataSource):
+    """Copernicus Marine Service through the copernicusmarine toolbox"""
+
+    name = 'copernicus'
+
+    def open_dataset(self, dataset_id, variables, minimum_longitude, maximum_longitude,
+                     minimum_latitude, maximum_latitude, start_datetime, end_datetime,
+                     minimum_depth=None, maximum_depth=None):
+        if copernicusmarine is None:
+            raise RuntimeError('copernicusmarine is not installed (pip install -r requirements.txt)')
+        return copernicusmarine.open_dataset(
+            dataset_id=dataset_id,
+            variables=list(variables),
+            minimum_longitude=minimum_longitude,
+            maximum_longitude=maximum_longitude,
+            minimum_latitude=minimum_latitude,
+            maximum_latitude=maximum_latitude,
+            start_datetime=start_datetime,
+            end_datetime=end_datetime,
+            minimum_depth=minimum_depth,
+            maximum_depth=maximum_depth
+        )
+
+
+def _end_of_day(end_datetime: str) -> pd.Timestamp:
+    """A bare YYYY-MM-DD end date covers that whole day"""
+    end = pd.Timestamp(end_datetime)
+    if len(end_datetime) <= 10:
+        end += pd.Timedelta(hours=23, minutes=59)
+    return end
+
+
+def _grid_axis(low: float, high: float) -> np.ndarray:
+    """Points of the global 1/12° grid between low and high inclusive"""
+    return np.arange(np.ceil(low * 12 - 1e-6), np.floor(high * 12 + 1e-6) + 1) / 12.0
+
+
+def synthetic_dataset(dataset_id: str, variables: Sequence[str],
+                      minimum_longitude: float, maximum_longitude: float,
+                      minimum_latitude: float, maximum_latitude: float,
+                      start_datetime: str, end_datetime: str,
+                      minimum_depth: Optional[float] = None,
+                      maximum_depth: Optional[float] = None) -> xr.Dataset:
+    """
+    Deterministic, plausible ocean fields for the requested slice
+
+    Values depend only on (variable, time, depth, lat, lon), so overlapping
+    requests agree with each other. Sri Lanka itself is masked as land (NaN).
+    """
+    latitude = _grid_axis(minimum_latitude, maximum_latitude)
+    longitude = _grid_axis(minimum_longitude, maximum_longitude)
+    three_hourly = 'PT3H' in dataset_id
+    time = pd.date_range(pd.Timestamp(start_datetime).normalize(), _end_of_day(end_datetime),
+                         freq='3h' if three_hourly else '1D')
+
+    lat = latitude[None, :, None]
+    lon = longitude[None, None, :]
+    day = (time.dayofyear.values + time.hour.values / 24.0)[:, None, None]
+    season = np.sin(2 * np.pi * (day - 80) / 365.25)
+
+    # Sri Lanka as an ellipse of land cells
+    land = ((lat - 7.85) / 1.95) ** 2 + ((lon - 80.75) / 0.95) ** 2 <= 1.0
+
+    depth = None
+    if not three_hourly:
+        low = minimum_depth if minimum_depth is not None else 0.0
+        high = maximum_depth if maximum_depth is not None else low + 1.0
+        depth = MODEL_DEPTHS[(MODEL_DEPTHS >= low - 1e-6) & (MODEL_DEPTHS <= high + 1e-6)]
+        if len(depth) == 0:
+            depth = MODEL_DEPTHS[[int(np.argmin(np.abs(MODEL_DEPTHS - low)))]]
+
+    def surface_field(var):
+        swirl = np.sin(lat * 2.1 + day / 9.0) * np.cos(lon * 1.7 - day / 13.0)
+        if var == 'thetao':
+            return 28.3 + 1.2 * season - 0.25 * (lat - 7.5) + 0.4 * swirl
+        if var == 'so':
+            return 34.2 - 0.6 * season + 0.15 * (lon - 80.5) + 0.1 * swirl
+        if var == 'uo':
+            return 0.35 * season * np.cos(lat * 1.3) + 0.1 * swirl
+        if var == 'vo':
+            return 0.2 * np.sin(lon * 1.1 + day / 20.0) + 0.08 * swirl
+        if var == 'VHM0':
+            return 1.6 + 0.8 * season * (1 + 0.2 * (lat - 7.5)) + 0.3 * swirl
+        if var == 'VMDR':
+            return (225 + 90 * season + 15 * swirl) % 360
+        if var == 'VTPK':
+            return 9.0 + 2.5 * season + 0.8 * swirl
+        return 0.0 * swirl
+
+    def with_depth(var, surface):
+        z = depth[None, :, None, None]
+        surface = surface[:, None, :, :]
+        if var == 'thetao':
+            return 8.0 + (surface - 8.0) * np.exp(-np.maximum(z - 40.0, 0.0) / 180.0)
+        if var == 'so':
+            return surface + 0.8 * (1 - np.exp(-z / 120.0))
+        return surface * np.exp(-z / 250.0)
+
+    data_vars = {}
+    for var in variables:
+        field = np.broadcast_to(surface_field(var), (len(time), len(latitude), len(longitude)))
+        if depth is None:
+            values = np.where(land, np.nan, field)
+            data_vars[var] = (('time', 'latitude', 'longitude'), values.astype(np.float32))
+        else:
+            values = np.where(land[:, None], np.nan, with_depth(var, field))
+            data_vars[var] = (('time', 'depth', 'latitude', 'longitude'), values.astype(np.float32))
+
+    coords = {'time': time, 'latitude': latitude, 'longitude': longitude}
+    if depth is not None:
+        coords['depth'] = depth
+    return xr.Dataset(data_vars, coords=coords)
+
+
+class LocalSource(OceanDataSource):
+    """
+    Cubes from local NetCDF/Zarr files, synthetic data when no file exists
+
+    A file '<data_dir>/<dataset_id>.nc' (or '.zarr') is opened once and
+    subset with the same bounds, time and depth filters as the live service.
+    """
+
+    name = 'local'
+
+    def __init__(self, data_dir: Optional[str] = None, synthetic: bool = True):
+        self.data_dir = data_dir or os.environ.get('OCEAN_LOCAL_DATA_DIR', '')
+        self.synthetic = synthetic
+        self._datasets: Dict[str, xr.Dataset] = {}
+
+    def _recorded(self, dataset_id: str) -> Optional[xr.Dataset]:
+        if dataset_id in self._datasets:
+            return self._datasets[dataset_id]
+        if not self.data_dir:
+            return None
+
+        for suffix, opener in (('.nc', xr.open_dataset), ('.zarr', xr.open_zarr)):
+            path = os.path.join(self.data_dir, dataset_id + suffix)
+            if os.path.exists(path):
+                logger.info(f"Using recorded cube {path}")
+                self._datasets[dataset_id] = opener(path)
+                return self._datasets[dataset_id]
+        return None
+
+    def open_dataset(self, dataset_id, variables, minimum_longitude, maximum_longitude,
+                     minimum_latitude, maximum_latitude, start_datetime, end_datetime,
+                     minimum_depth=None, maximum_depth=None):
+        recorded = self._recorded(dataset_id)
+
+        if recorded is None:
+            if not self.synthetic:
+                raise FileNotFoundError(f"No local cube for {dataset_id} in {self.data_dir}")
+            return synthetic_dataset(dataset_id, variables, minimum_longitude, maximum_longitude,
+                                     minimum_latitude, maximum_latitude, start_datetime, end_datetime,
+                                     minimum_depth, maximum_depth)
+
+        subset = recorded[list(variables)].sel(
+            latitude=slice(minimum_latitude, maximum_latitude),
+            longitude=slice(minimum_longitude, maximum_longitude),
+            time=slice(pd.Timestamp(start_datetime), _end_of_day(end_datetime))
+        )
+        if 'depth' in subset.dims and minimum_depth is not None:
+            subset = subset.sel(depth=slice(minimum_depth, maximum_depth))
+        if subset.sizes.get('time', 0) == 0:
+            raise ValueError(f"No local data for {dataset_id} between {start_datetime} and {end_datetime}")
+        return subset.load()
+
+
+SOURCES = {
+    'copernicus': CopernicusSource,
+    'local': LocalSource
+}
+
+
+def make_source(name: Optional[str] = None) -> OceanDataSource:
+    """Build the data source named by name or OCEAN_DATA_SOURCE (default copernicus)"""
+    name = (name or os.environ.get('OCEAN_DATA_SOURCE', 'copernicus')).lower()
+    if name not in SOURCES:
+        raise ValueError(f"Unknown OCEAN_DATA_SOURCE '{name}'. Must be one of: {', '.join(SOURCES)}")
+    return SOURCES[name]()
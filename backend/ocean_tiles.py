@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Ocean Raster Tiles
+Renders colour-mapped XYZ (Web Mercator) PNG tiles from cached ocean grids.
+
+Colouring is a single lookup-table index per pixel, pixels are mapped to grid
+cells with index arithmetic on the regular Copernicus grid, and PNGs are
+encoded with zlib directly so no imaging library is needed.
+"""
+
+import math
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ocean_grid import fractional_index
+
+TILE_SIZE = 256
+
+# Colormap control points: (position 0-1, (r, g, b))
+COLORMAPS = {
+    'thermal': [
+        (0.0, (4, 35, 51)), (0.2, (23, 71, 158)), (0.4, (50, 150, 190)),
+        (0.6, (120, 200, 120)), (0.8, (245, 175, 60)), (1.0, (200, 30, 30))
+    ],
+    'haline': [
+        (0.0, (42, 24, 108)), (0.25, (16, 83, 151)), (0.5, (19, 140, 139)),
+        (0.75, (92, 186, 99)), (1.0, (253, 238, 153))
+    ],
+    'waves': [
+        (0.0, (225, 245, 254)), (0.3, (100, 181, 246)), (0.6, (30, 90, 200)),
+        (0.8, (110, 50, 170)), (1.0, (180, 20, 90))
+    ]
+}
+
+
+def build_lut(name: str, alpha: int = 220) -> np.ndarray:
+    """Expand a colormap's control points into a (256, 4) uint8 RGBA table"""
+    points = COLORMAPS[name]
+    positions = np.array([p for p, _ in points])
+    colors = np.array([c for _, c in points], dtype=np.float64)
+    x = np.linspace(0.0, 1.0, 256)
+
+    lut = np.empty((256, 4), dtype=np.uint8)
+    for channel in range(3):
+        lut[:, channel] = np.rint(np.interp(x, positions, colors[:, channel]))
+    lut[:, 3] = alpha
+    return lut
+
+
+def tile_pixel_coordinates(z: int, x: int, y: int, size: int = TILE_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitude of each pixel row and longitude of each pixel column (pixel centres)"""
+    n = 2 ** z
+    offsets = (np.arange(size) + 0.5) / size
+    lons = (x + offsets) / n * 360.0 - 180.0
+    merc = math.pi * (1 - 2 * (y + offsets) / n)
+    lats = np.degrees(np.arctan(np.sinh(merc)))
+    return lats, lons
+
+
+def tile_bounds(z: int, x: int, y: int) -> Dict:
+    """Lat/lon bounding box of a tile"""
+    n = 2 ** z
+
+    def lat_at(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return {
+        'min_lat': lat_at(y + 1),
+        'max_lat': lat_at(y),
+        'min_lon': x / n * 360.0 - 180.0,
+        'max_lon': (x + 1) / n * 360.0 - 180.0
+    }
+
+
+def tiles_covering(bounds: Dict, z: int) -> List[Tuple[int, int]]:
+    """All (x, y) tile indices at zoom z that intersect a lat/lon bounding box"""
+    n = 2 ** z
+
+    def tile_x(lon):
+        return int((lon + 180.0) / 360.0 * n)
+
+    def tile_y(lat):
+        lat_rad = math.radians(lat)
+        return int((1 - math.asinh(math.tan(lat_rad)) / math.pi) / 2 * n)
+
+    x0, x1 = tile_x(bounds['min_lon']), tile_x(bounds['max_lon'])
+    y0, y1 = tile_y(bounds['max_lat']), tile_y(bounds['min_lat'])
+    return [(x, y) for x in range(x0, min(x1, n - 1) + 1) for y in range(y0, min(y1, n - 1) + 1)]
+
+
+def render_tile(grid: np.ndarray, latitude: np.ndarray, longitude: np.ndarray,
+                z: int, x: int, y: int, vmin: float, vmax: float, lut: np.ndarray,
+                size: int = TILE_SIZE) -> np.ndarray:
+    """
+    Colour one tile from a 2-D (latitude, longitude) grid
+
+    Pixels outside the grid or over missing cells are fully transparent.
+
+    Returns:
+        (size, size, 4) uint8 RGBA image
+    """
+    lats, lons = tile_pixel_coordinates(z, x, y, size)
+    rows = np.rint(fractional_index(latitude, lats)).astype(np.intp)
+    cols = np.rint(fractional_index(longitude, lons)).astype(np.intp)
+    row_ok = (rows >= 0) & (rows < len(latitude))
+    col_ok = (cols >= 0) & (cols < len(longitude))
+
+    values = grid[np.ix_(np.clip(rows, 0, len(latitude) - 1), np.clip(cols, 0, len(longitude) - 1))]
+    valid = row_ok[:, None] & col_ok[None, :] & ~np.isnan(values)
+
+    scaled = (np.nan_to_num(values, nan=vmin) - vmin) / (vmax - vmin)
+    index = np.clip(scaled * 255, 0, 255).astype(np.uint8)
+
+    image = lut[index]
+    image[~valid] = 0
+    return image
+
+
+def encode_png(rgba: np.ndarray, level: int = 6) -> bytes:
+    """Encode an (h, w, 4) uint8 array as an RGBA PNG"""
+    height, width = rgba.shape[:2]
+    # Each scanline is prefixed with filter type 0 (None)
+    raw = np.concatenate(
+        [np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, width * 4)], axis=1
+    ).tobytes()
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (struct.pack('>I', len(data)) + kind + data +
+                struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw, level)) + chunk(b'IEND', b''))
+
+
+BLANK_TILE = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+
+
+class TileCache:
+    """Thread-safe LRU cache of encoded tiles with a TTL (per tile when given)"""
+
+    def __init__(self, max_entries: int = 2048, ttl: int = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._tiles = OrderedDict()  # key -> (expires_at, png bytes)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'rendered': 0}
+
+    def get(self, key) -> Optional[Tuple[bytes, float]]:
+        """(png, seconds until it expires), or None"""
+        with self._lock:
+            entry = self._tiles.get(key)
+            now = time.time()
+            if entry is not None and now < entry[0]:
+                self._tiles.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1], entry[0] - now
+            if entry is not None:
+                del self._tiles[key]
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key, png: bytes, ttl: Optional[float] = None):
+        with self._lock:
+            self._tiles[key] = (time.time() + (self.ttl if ttl is None else ttl), png)
+            self._tiles.move_to_end(key)
+            self.stats['rendered'] += 1
+            while len(self._tiles) > self.max_entries:
+                self._tiles.popitem(last=False)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._tiles)
+        return stats
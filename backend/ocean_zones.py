@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Zonal Statistics
+Per-zone summaries (fisheries districts, EEZ, ...) of ocean grids.
+
+Each zone set is a GeoJSON FeatureCollection of Polygon/MultiPolygon zones in
+<directory>/<set>.geojson. Zones within a set should not overlap (a cell
+belongs to the last zone containing it); overlapping groupings such as
+districts and the EEZ go in separate sets.
+
+A set is rasterized once per grid into an integer label array (0 = no zone,
+n = n-th zone, by cell centre) and kept until its file changes. Statistics
+for every zone and time step then come from one np.bincount pass (count,
+mean) and one sort by (label, value) (min, max, percentiles) instead of a
+mask per zone.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ZONES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'zones')
+
+
+def _feature_polygons(geometry: Dict) -> List[List[np.ndarray]]:
+    """Polygons of a GeoJSON geometry as lists of (n, 2) lon/lat rings"""
+    if geometry['type'] == 'Polygon':
+        polygons = [geometry['coordinates']]
+    elif geometry['type'] == 'MultiPolygon':
+        polygons = geometry['coordinates']
+    else:
+        raise ValueError(f"Unsupported zone geometry: {geometry['type']}")
+    return [[np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon] for polygon in polygons]
+
+
+def load_zones(path: str) -> List[Dict]:
+    """
+    Read a zone set file
+
+    Returns:
+        List of {'id', 'name', 'polygons'}; the id is the feature id or its
+        'id'/'name' property, falling back to the position in the file
+    """
+    with open(path, encoding='utf-8') as f:
+        collection = json.load(f)
+
+    zones = []
+    for n, feature in enumerate(collection['features'], start=1):
+        properties = feature.get('properties') or {}
+        zone_id = feature.get('id', properties.get('id', properties.get('name', n)))
+        zones.append({
+            'id': str(zone_id),
+            'name': properties.get('name', str(zone_id)),
+            'polygons': _feature_polygons(feature['geometry'])
+        })
+    return zones
+
+
+def rasterize_zones(zones: List[Dict], latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """
+    Label raster of a zone set on a grid
+
+    Cells whose centre is inside a zone get its 1-based position in zones
+    (holes are excluded with the even-odd rule). Each polygon edge is crossed
+    with every grid row at once, so the cost is edges x rows, not cells.
+
+    Returns:
+        int32 array of shape (latitude, longitude), 0 outside every zone
+    """
+    labels = np.zeros((len(latitude), len(longitude)), dtype=np.int32)
+    lat = np.asarray(latitude, dtype=np.float64)[:, None]
+    lon = np.asarray(longitude, dtype=np.float64)[None, :]
+
+    for label, zone in enumerate(zones, start=1):
+        for polygon in zone['polygons']:
+            inside = np.zeros(labels.shape, dtype=bool)
+            for ring in polygon:
+                x0, y0 = ring[:, 0], ring[:, 1]
+                x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+                for ax, ay, bx, by in zip(x0, y0, x1, y1):
+                    straddles = (ay > lat) != (by > lat)
+                    if not straddles.any():
+                        continue
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        crossing = ax + (lat - ay) * (bx - ax) / (by - ay)
+                    inside ^= straddles & (lon < crossing)
+            labels[inside] = label
+    return labels
+
+
+def zonal_stats(values: np.ndarray, labels: np.ndarray, n_zones: int,
+                percentiles: Sequence[float] = (10, 50, 90)) -> Dict[str, np.ndarray]:
+    """
+    Per-zone statistics of a grid in a single pass over its cells
+
+    Args:
+        values: Array whose last two axes match labels; leading axes (time)
+                are summarized separately
+        labels: Zone label raster from rasterize_zones
+        n_zones: Number of zones (labels 1..n_zones)
+        percentiles: Percentiles to compute (0-100, linear interpolation)
+
+    Returns:
+        Dict of 'count', 'mean', 'min', 'max' and 'p<q>' arrays of shape
+        values.shape[:-2] + (n_zones,), NaN where a zone has no valid cells
+    """
+    lead = values.shape[:-2]
+    n_steps = int(np.prod(lead, dtype=np.int64))
+    flat = values.reshape(n_steps, -1)
+    bins = n_zones + 1
+
+    # One label per (step, zone), so every step is reduced in the same pass
+    keys = (np.arange(n_steps)[:, None] * bins + labels.ravel()[None, :])
+    valid = ~np.isnan(flat) & (labels.ravel() > 0)[None, :]
+    keys, data = keys[valid], flat[valid].astype(np.float64)
+
+    count = np.bincount(keys, minlength=n_steps * bins)
+    total = np.bincount(keys, weights=data, minlength=n_steps * bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+
+    # Sorted by zone, then value: each zone's values are one contiguous run
+    order = np.lexsort((data, keys))
+    data = data[order]
+    start = np.concatenate([[0], np.cumsum(count)[:-1]])
+    has_data = count > 0
+
+    def ranked(q):
+        position = start + q / 100 * np.maximum(count - 1, 0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, start + np.maximum(count - 1, 0))
+        result = np.full(len(count), np.nan)
+        if len(data):
+            lo = data[np.minimum(lower, len(data) - 1)]
+            hi = data[np.minimum(upper, len(data) - 1)]
+            result = np.where(has_data, lo + (hi - lo) * (position - lower), np.nan)
+        return result
+
+    stats = {
+        'count': count,
+        'mean': np.where(has_data, mean, np.nan),
+        'min': ranked(0),
+        'max': ranked(100)
+    }
+    for q in percentiles:
+        stats[f'p{q:g}'] = ranked(q)
+
+    # Drop the "no zone" bin and restore the leading axes
+    return {name: array.reshape(n_steps, bins)[:, 1:].reshape(lead + (n_zones,))
+            for name, array in stats.items()}
+
+
+class ZoneSets:
+    """Zone set files and their label rasters, rasterized once per grid and file version"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.environ.get('OCEAN_ZONES_DIR', DEFAULT_ZONES_DIR)
+        self._cache = {}  # (name, grid) -> (mtime, zones, labels)
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.geojson")
+
+    def names(self) -> List[str]:
+        """Available zone sets"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-len('.geojson')] for name in os.listdir(self.directory)
+                      if name.endswith('.geojson'))
+
+    def labels(self, name: str, latitude: np.ndarray,
+               longitude: np.ndarray) -> Optional[Tuple[List[Dict], np.ndarray, float]]:
+        """
+        Zones of a set and their label raster on a grid
+
+        Returns:
+            (zones, labels, version) or None if the set does not exist; the
+            version (file mtime) changes when the file is edited
+        """
+        if name not in self.names():
+            return None
+        path = self._path(name)
+        mtime = os.path.getmtime(path)
+        grid = (len(latitude), float(latitude[0]), float(latitude[-1]),
+                len(longitude), float(longitude[0]), float(longitude[-1]))
+
+        with self._lock:
+            cached = self._cache.get((name, grid))
+            if cached is not None and cached[0] == mtime:
+                return cached[1], cached[2], mtime
+
+        zones = load_zones(path)
+        labels = rasterize_zones(zones, latitude, longitude)
+        logger.info(f"Rasterized {len(zones)} {name} zone(s) onto a {labels.shape[0]}x{labels.shape[1]} grid")
+
+        with self._lock:
+            self._cache[(name, grid)] = (mtime, zones, labels)
+        return zones, labels, mtime